@@ -1,3 +1,4 @@
+import functools
 import numpy as np
 import typing
 
@@ -25,6 +26,10 @@ class AlphabetCode:
             self.chars |= codes
             self.alphabets |= {name: (alphabet, char_list_len)}
 
+        self.translation_table = functools.lru_cache(maxsize=64)(
+            self.make_translation_table
+        )
+
 
     @staticmethod
     def form_alphabet(
@@ -72,6 +77,23 @@ class AlphabetCode:
         return {c: i for i, c in enumerate(chars)}
 
 
+    def make_translation_table(self, k: int, func) -> dict[int, str]:
+        table = {}
+        for c, (code, l, name) in self.chars.items():
+            nc: str = self.alphabets[name][0][func(code, l, k)]
+            table[ord(c)] = nc.lower() if c.islower() else nc.upper()
+        return table
+
+
+    def validate_text(self, text: str):
+        invalid = set(text).difference(self.chars, self.valid_chars)
+        if not invalid:
+            return
+        for c in text:
+            if c in invalid:
+                raise ValueError(f"Некоректний символ: {c}")
+
+
     def code(
         self, text: str, k: int, func, use_data_validation = False
     ) -> str:
@@ -84,34 +106,18 @@ class AlphabetCode:
                 "Ключ повинен бути меншим за потужність алфавіту"
             )
         
-        result = ""
-        for c in text:
-            if v := self.chars.get(c):
-                code, l, name = v
-                ncode = func(code, l, k)
-                nc: str = self.alphabets[name][0][ncode]
-
-                if c.islower():
-                    result += nc.lower()
-                else:
-                    result += nc.upper()
-            elif use_data_validation and c not in self.valid_chars:
-                raise ValueError(f"Некоректний символ: {c}")
-            else:
-                result += c
+        if use_data_validation:
+            self.validate_text(text)
 
-        return result
+        return text.translate(self.translation_table(k, func))
     
 
 class FileCode:
+    CHUNK_SIZE = 1 << 22
+
+
     @staticmethod
-    def code(
-        file: bytes, 
-        k: int, 
-        l: int, 
-        func, 
-        use_index: typing.Literal["encode", "decode"] = None,
-    ) -> bytes:
+    def validate_key(k: int, l: int):
         if k < 1:
             raise ValueError("Ключ повинен бути більшим за 0")
         if l < 1:
@@ -120,13 +126,120 @@ class FileCode:
             raise ValueError(
                 "Ключ повинен бути меншим за потужність набору даних"
             )
+
+
+    @staticmethod
+    def code(
+        file: bytes, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+    ) -> bytearray:
+        FileCode.validate_key(k, l)
         
-        result = []
-        for i, c in enumerate(file):
-            n = c
-            if use_index == "encode":
-                n += i
-            elif use_index == "decode":
-                n -= i
-            result.append(func(n, l, k))
-        return bytes(result)
\ No newline at end of file
+        # numpy пише результат прямо в bytearray частинами code_into, тому
+        # немає ні копії через tobytes, ні проміжних масивів на весь файл
+        data = FileCode.as_byte_array(file)
+        return FileCode.code_into(
+            data, k, l, func, use_index, out=bytearray(len(data))
+        )
+    
+
+    @staticmethod
+    def code_into(
+        buffer, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        out = None,
+        start: int = 0,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        FileCode.validate_key(k, l)
+        if chunk_size < 1:
+            raise ValueError("Розмір частини повинен бути більшим за 0")
+
+        # без out буфер змінюється на місці й повертається той самий об'єкт
+        data = FileCode.as_byte_array(buffer)
+        target = FileCode.as_byte_array(buffer if out is None else out)
+        if not target.flags.writeable:
+            raise ValueError("Буфер результату доступний лише для читання")
+        if len(target) != len(data):
+            raise ValueError(
+                "Розмір буфера результату не збігається з розміром даних"
+            )
+
+        # обробка частинами обмежує розмір проміжних масивів режиму індексу
+        for i in range(0, len(data), chunk_size):
+            FileCode.code_array(
+                data[i:i + chunk_size], 
+                target[i:i + chunk_size], 
+                k, l, func, use_index, start + i
+            )
+
+        return buffer if out is None else out
+    
+
+    @staticmethod
+    def as_byte_array(buffer) -> np.ndarray:
+        if isinstance(buffer, np.ndarray):
+            if buffer.dtype != np.uint8:
+                raise ValueError("Масив повинен мати тип uint8")
+            if not buffer.flags.c_contiguous:
+                raise ValueError("Масив повинен займати неперервну пам'ять")
+            return buffer.reshape(-1)
+        return np.frombuffer(buffer, dtype=np.uint8)
+    
+
+    @staticmethod
+    def code_array(
+        data: np.ndarray, 
+        out: np.ndarray, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        start: int = 0
+    ):
+        if use_index not in ("encode", "decode"):
+            table = FileCode.make_table(k, l, func)
+            FileCode.check_range(table, data)
+            np.take(table.astype(np.uint8), data, out=out)
+        else:
+            result = func(
+                FileCode.shift_by_index(data, use_index, start), l, k
+            )
+            FileCode.check_range(result)
+            out[:] = result
+    
+
+    @staticmethod
+    def make_table(k: int, l: int, func) -> np.ndarray:
+        # func застосовується до всього масиву байтів одразу, тому повинна
+        # складатися лише з арифметичних операцій (як у CaesarCipher)
+        return func(np.arange(256, dtype=np.int64), l, k)
+    
+
+    @staticmethod
+    def shift_by_index(
+        data: np.ndarray, 
+        use_index: typing.Literal["encode", "decode"],
+        start: int = 0
+    ) -> np.ndarray:
+        index = np.arange(start, start + len(data), dtype=np.int64)
+        if use_index == "encode":
+            return data + index
+        elif use_index == "decode":
+            return data - index
+        raise ValueError(f"Невідомий режим індексу: {use_index}")
+    
+
+    @staticmethod
+    def check_range(values: np.ndarray, data: np.ndarray = None):
+        invalid = (values < 0) | (values > 255)
+        if data is not None and invalid.any():
+            invalid = invalid[data]
+        if invalid.any():
+            raise ValueError("bytes must be in range(0, 256)")
\ No newline at end of file
@@ -0,0 +1,230 @@
+import argparse
+import concurrent.futures
+import os
+import sys
+import time
+import typing
+
+import numpy as np
+from PIL import Image
+
+import components
+
+
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg", ".bmp", ".gif", ".tif", ".tiff")
+# зашифровані пікселі не можна зберігати з втратами, тому результат
+# завжди записується у формат без втрат
+OUTPUT_FORMAT = "PNG"
+worker = {}
+
+
+def to_pixels(img: Image.Image) -> np.ndarray:
+    pixels = np.array(img)
+    if pixels.dtype != np.uint8:
+        raise ValueError(f"Непідтримуваний режим зображення: {img.mode}")
+    return pixels
+
+
+def to_image(pixels: np.ndarray, img: Image.Image) -> Image.Image:
+    result = Image.frombytes(img.mode, img.size, pixels)
+    if img.mode == "P":
+        result.putpalette(img.getpalette())
+    return result
+
+
+def channel_keys(pixels: np.ndarray, keys: int | typing.Sequence[int]) \
+        -> list[int]:
+    channels = pixels.shape[2] if pixels.ndim == 3 else 1
+    keys = [keys] if isinstance(keys, int) else list(keys)
+    if len(keys) == 1:
+        keys *= channels
+    if len(keys) != channels:
+        raise ValueError(
+            "Кількість ключів повинна дорівнювати кількості каналів "
+            f"зображення ({channels})"
+        )
+    for k in keys:
+        components.FileCode.validate_key(k, 256)
+    return keys
+
+
+def code_pixels(
+    pixels: np.ndarray,
+    keys: int | typing.Sequence[int],
+    func,
+    use_index: typing.Literal["encode", "decode"] = None,
+    start: int = 0
+) -> np.ndarray:
+    keys = channel_keys(pixels, keys)
+    if len(set(keys)) == 1:
+        return components.FileCode.code_into(
+            pixels, keys[0], 256, func, use_index, start=start
+        )
+
+    # індекс — позиція байта в рядку пікселів, як у img.tobytes(),
+    # тому результат збігається з FileCode.code для тих самих ключів
+    channels = len(keys)
+    for c, k in enumerate(keys):
+        channel = pixels[..., c]
+        if use_index not in ("encode", "decode"):
+            table = components.FileCode.make_table(k, 256, func)
+            components.FileCode.check_range(table, channel)
+            channel[...] = table.astype(np.uint8)[channel]
+        else:
+            index = np.arange(
+                start + c, start + pixels.size, channels, dtype=np.int64
+            ).reshape(channel.shape)
+            values = channel + index if use_index == "encode" \
+                else channel - index
+            result = func(values, 256, k)
+            components.FileCode.check_range(result)
+            channel[...] = result
+    return pixels
+
+
+def code_image(
+    img: Image.Image,
+    keys: int | typing.Sequence[int],
+    func,
+    use_index: typing.Literal["encode", "decode"] = None
+) -> Image.Image:
+    pixels = code_pixels(to_pixels(img), keys, func, use_index)
+    return to_image(pixels, img)
+
+
+def code_image_file(
+    src_path: str,
+    dst_path: str,
+    keys: int | typing.Sequence[int],
+    action: typing.Literal["encode", "decode"],
+    use_index: bool = False
+) -> int:
+    func = {
+        "encode": components.CaesarCipher.encode_caesar,
+        "decode": components.CaesarCipher.decode_caesar
+    }[action]
+    with Image.open(src_path) as img:
+        result = code_image(img, keys, func, action if use_index else None)
+    result.save(dst_path, OUTPUT_FORMAT)
+    return result.width * result.height
+
+
+def collect_images(
+    path: str, output: str, action: str
+) -> list[tuple[str, str]]:
+    jobs = []
+    for root, _, files in os.walk(path):
+        for name in sorted(files):
+            if not name.lower().endswith(IMAGE_EXTENSIONS):
+                continue
+            src = os.path.join(root, name)
+            relative = os.path.splitext(os.path.relpath(src, path))[0]
+            jobs.append((
+                src, os.path.join(output, f"{relative}_{action}.png")
+            ))
+    return jobs
+
+
+def init_worker(keys: list[int], action: str, use_index: bool):
+    worker.update({"keys": keys, "action": action, "use_index": use_index})
+
+
+def process_image(paths: tuple[str, str]) -> tuple[int, str | None]:
+    src_path, dst_path = paths
+    # помилка в одному зображенні (наприклад, інша кількість каналів)
+    # повертається разом з результатом і не зупиняє обробку каталогу
+    try:
+        if os.path.dirname(dst_path):
+            os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+        return code_image_file(
+            src_path, dst_path,
+            worker["keys"], worker["action"], worker["use_index"]
+        ), None
+    except (ValueError, OSError, Image.DecompressionBombError) as ex_:
+        return 0, str(ex_)
+
+
+def code_directory(
+    path: str,
+    output: str,
+    keys: int | typing.Sequence[int],
+    action: typing.Literal["encode", "decode"],
+    use_index: bool = False,
+    workers: int = None
+) -> dict:
+    jobs = collect_images(path, output, action)
+    keys = [keys] if isinstance(keys, int) else list(keys)
+
+    start = time.perf_counter()
+    if len(jobs) == 1 or workers == 1:
+        init_worker(keys, action, use_index)
+        results = [process_image(job) for job in jobs]
+    else:
+        with concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=init_worker,
+            initargs=(keys, action, use_index)
+        ) as executor:
+            results = list(executor.map(process_image, jobs))
+    seconds = time.perf_counter() - start
+
+    errors = {
+        src_path: error
+        for (src_path, _), (_, error) in zip(jobs, results) if error
+    }
+    pixels = sum(count for count, _ in results)
+    return {
+        "images": len(jobs) - len(errors),
+        "errors": errors,
+        "pixels": pixels,
+        "seconds": seconds,
+        "megapixels_per_second": pixels / seconds / 1e6 if seconds else 0.0
+    }
+
+
+def parse_args(args: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Пакетне шифрування зображень каталогу"
+    )
+    parser.add_argument("action", choices=["encode", "decode"])
+    parser.add_argument("path", help="каталог із зображеннями")
+    parser.add_argument(
+        "-k", "--key", type=int, action="append", required=True,
+        help="ключ; повторіть для окремого ключа кожного каналу"
+    )
+    parser.add_argument(
+        "--use-index", action="store_true",
+        help="використовувати індекс для шифрування"
+    )
+    parser.add_argument("-o", "--output", help="каталог для результатів")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="кількість процесів для обробки зображень"
+    )
+    return parser.parse_args(args)
+
+
+def main(args: list[str] = None) -> int:
+    args = parse_args(args)
+    output = args.output or f"{args.path.rstrip(os.sep)}_{args.action}"
+
+    try:
+        stats = code_directory(
+            args.path, output, args.key, args.action,
+            args.use_index, args.workers
+        )
+    except Exception as ex_:
+        print(f"Помилка: {ex_}", file=sys.stderr)
+        return 1
+
+    for src_path, error in stats["errors"].items():
+        print(f"Пропущено {src_path}: {error}", file=sys.stderr)
+    print(
+        f"Зображень: {stats['images']}, пропущено: {len(stats['errors'])}, "
+        f"пікселів: {stats['pixels']}, час: {stats['seconds']:.3f} с, "
+        f"швидкість: {stats['megapixels_per_second']:.2f} Мп/с"
+    )
+    return 0 if not stats["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -8,15 +8,9 @@ import streamlit as st
 import components
 
 
-def load_env():
+@st.cache_resource(max_entries=1)
+def load_alphabet(path: str, version: int) -> components.AlphabetCode:
     try:
-        if not dotenv.load_dotenv():
-            raise FileNotFoundError("./.env")
-        
-        path = os.getenv("SETTINGS_PATH")
-        if not path:
-            raise ValueError(path)
-
         with open(path) as file:
             data = json.load(file)
 
@@ -25,10 +19,6 @@ def load_env():
         alphabet = components.AlphabetCode(
             valid_chars=valid_chars, **alphabets
         )
-    except ValueError as ex_:
-        raise Exception(
-            "Необхідно внести шлях файлу налаштувань в SETTINGS_PATH"
-        )
     except FileNotFoundError as ex_:
         raise Exception(
             f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
@@ -41,16 +31,63 @@ def load_env():
         raise Exception(
             f"Значення alphabets повинно бути словником"
         )
+    
+    return alphabet
+
+
+def settings_version() -> tuple[str, int]:
+    # алфавіт і результати спільні для всіх сесій та перебудовуються,
+    # коли змінюється файл налаштувань
+    path = st.session_state["settings_path"]
+    try:
+        return path, os.stat(path).st_mtime_ns
+    except FileNotFoundError as ex_:
+        raise Exception(
+            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+        )
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def code_text(
+    path: str, version: int, text: str, k: int, action: str, use_validation
+) -> str:
+    return load_alphabet(path, version).code(
+        text=text, 
+        k=k, 
+        func={
+            "encode": components.CaesarCipher.encode_caesar,
+            "decode": components.CaesarCipher.decode_caesar
+        }[action], 
+        use_data_validation=use_validation
+    )
+
+
+def load_env():
+    try:
+        if not dotenv.load_dotenv():
+            raise FileNotFoundError("./.env")
+        
+        path = os.getenv("SETTINGS_PATH")
+        if not path:
+            raise ValueError(path)
+    except ValueError as ex_:
+        raise Exception(
+            "Необхідно внести шлях файлу налаштувань в SETTINGS_PATH"
+        )
+    except FileNotFoundError as ex_:
+        raise Exception(
+            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+        )
     else:
         st.session_state.update({
-            "alphabet": alphabet,
+            "settings_path": path,
             "loaded": True
         })
+        load_alphabet(*settings_version())
 
 
 
 def show_text_coder():
-    alphabet: components.AlphabetCode = st.session_state["alphabet"]
     text: str = st.session_state.get("text") or ""
     use_validation = st.checkbox("Використовувати валідацію даних")
     key = st.number_input("Ключ", step=1, min_value=1)
@@ -66,11 +103,14 @@ def show_text_coder():
             st.session_state.update({"text": file.read().decode("utf-8")})
 
         if encode_btn:
-            result = alphabet.code(
+            path, version = settings_version()
+            result = code_text(
+                path=path,
+                version=version,
                 text=text, 
                 k=key, 
-                func=components.CaesarCipher.encode_caesar, 
-                use_data_validation=use_validation
+                action="encode",
+                use_validation=use_validation
             )
             st.title("Результат")
             st.write(result)
@@ -79,11 +119,14 @@ def show_text_coder():
             )
 
         if decode_btn:
-            result = alphabet.code(
+            path, version = settings_version()
+            result = code_text(
+                path=path,
+                version=version,
                 text=text, 
                 k=key, 
-                func=components.CaesarCipher.decode_caesar,
-                use_data_validation=use_validation
+                action="decode",
+                use_validation=use_validation
             )
             st.title("Результат")
             st.write(result)
@@ -111,8 +154,9 @@ def show_file_coder():
                 func=components.CaesarCipher.encode_caesar,
                 use_index= "encode" if use_index else None
             )
+            # st.download_button приймає bytes, але не bytearray
             st.download_button(
-                "Завантажити", result, f"encoded_{file.name}"
+                "Завантажити", bytes(result), f"encoded_{file.name}"
             )
 
         if decode_btn and file is not None:
@@ -123,8 +167,9 @@ def show_file_coder():
                 func=components.CaesarCipher.decode_caesar,
                 use_index= "decode" if use_index else None
             )
+            # st.download_button приймає bytes, але не bytearray
             st.download_button(
-                "Завантажити", result, f"decoded_{file.name}"
+                "Завантажити", bytes(result), f"decoded_{file.name}"
             )
     except Exception as ex_:
         st.error(f"Помилка: {ex_}")
@@ -0,0 +1,340 @@
+from datetime import datetime, timedelta
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+import typing
+
+import numpy as np
+
+import components
+
+
+SETTINGS_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "settings", "settings.json"
+)
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "..", "benchmark_baseline.json"
+)
+UNITS = {"K": 1 << 10, "M": 1 << 20, "G": 1 << 30}
+
+
+def parse_size(value: str) -> int:
+    value = value.strip().upper()
+    if value and value[-1] in UNITS:
+        return int(float(value[:-1]) * UNITS[value[-1]])
+    return int(value)
+
+
+def load_alphabet(path: str) -> components.AlphabetCode:
+    with open(path) as file:
+        data = json.load(file)
+
+    return components.AlphabetCode(
+        valid_chars=data["valid_chars"], **data["alphabets"]
+    )
+
+
+def generate_text(
+    alphabet: components.AlphabetCode, size: int, rng: np.random.Generator
+) -> str:
+    pool = np.array(
+        [ord(c) for c in alphabet.chars] + [ord(c) for c in " .,\n"],
+        dtype=np.uint32
+    )
+    points = rng.choice(pool, size)
+    return points.tobytes().decode("utf-32-le")
+
+
+def generate_bytes(size: int, rng: np.random.Generator) -> bytes:
+    return rng.integers(0, 256, size, dtype=np.uint8).tobytes()
+
+
+def measure(func: typing.Callable[[], typing.Any], repeat: int) -> dict:
+    # перший запуск під tracemalloc також прогріває кеші таблиць
+    tracemalloc.start()
+    try:
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    seconds = min(timeit(func) for _ in range(repeat))
+    stats = {"seconds": seconds, "peak_memory": peak}
+    # конвеєри зі стисненням повертають розмір результату
+    if isinstance(result, int):
+        stats["output_size"] = result
+    return stats
+
+
+def timeit(func: typing.Callable[[], typing.Any]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def text_cases(
+    alphabet: components.AlphabetCode, text: str
+) -> dict[str, typing.Callable[[], typing.Any]]:
+    return {
+        "caesar_text": lambda: alphabet.code_with_caesar_cypher(
+            text, 3, components.CaesarCipher.encode_caesar
+        ),
+        "tabula_recta_2_keys": lambda: alphabet\
+            .code_by_multiple_key_with_tabula_recta(text, 7, 11, "encode"),
+        "tabula_recta_3_keys": lambda: alphabet\
+            .code_by_multiple_key_with_tabula_recta(
+                text, 7, 11, "encode", c=13
+            ),
+        "keyword": lambda: alphabet.code_by_word_with_tabula_recta(
+            text, "ключ", "encode"
+        ),
+    }
+
+
+def file_cases(data: bytes) -> dict[str, typing.Callable[[], typing.Any]]:
+    return {
+        "file": lambda: components.FileCode.code(
+            data, 45, 256, components.CaesarCipher.encode_caesar
+        ),
+        "file_index": lambda: components.FileCode.code(
+            data, 45, 256, components.CaesarCipher.encode_caesar, "encode"
+        ),
+    }
+
+
+def compression_cases(
+    data: bytes
+) -> dict[str, typing.Callable[[], typing.Any]]:
+    def pipeline(compression: str | None) -> typing.Callable[[], int]:
+        # повний шлях файлу від читання до запису зашифрованого результату
+        def run() -> int:
+            dst = io.BytesIO()
+            components.FileCode.code_file(
+                io.BytesIO(data), dst, 45, 256, 
+                components.CaesarCipher.encode_caesar, 
+                compression=compression
+            )
+            return dst.tell()
+
+        return run
+
+    return {
+        "file_text": pipeline(None),
+        "file_zlib": pipeline("zlib"),
+        "file_lzma": pipeline("lzma"),
+    }
+
+
+def detection_case(
+    history: int, requests: int = 1000, backend: str = "memory"
+) -> typing.Callable[[], typing.Any]:
+    def run():
+        store = None
+        if backend == "sqlite":
+            import storage
+
+            directory = tempfile.TemporaryDirectory()
+            store = storage.SQLiteRequestStore(
+                os.path.join(directory.name, "detection.sqlite3"),
+                timedelta(seconds=history + requests)
+            )
+        detection = components.AttackTabulaRectaDetection(
+            tries=5, drop_tries=history + requests, store=store
+        )
+        dt = datetime(2024, 1, 1)
+        for i in range(history):
+            detection.insert_request(str(i), None, "decode", dt)
+            dt += timedelta(seconds=1)
+
+        start = time.perf_counter()
+        for i in range(requests):
+            detection.check_request(str(-i), None, "decode", dt)
+            detection.insert_request(str(-i), None, "decode", dt)
+            dt += timedelta(seconds=1)
+        seconds = time.perf_counter() - start
+
+        if store is not None:
+            store.close()
+            directory.cleanup()
+        return seconds
+
+    return run
+
+
+def run_benchmarks(
+    alphabet: components.AlphabetCode,
+    sizes: list[int],
+    histories: list[int],
+    repeat: int,
+    selected: set[str] = None
+) -> list[dict]:
+    rng = np.random.default_rng(0)
+    results = []
+
+    def report(case: str, size: int, unit: str, amount: int, stats: dict):
+        stats |= {
+            "case": case,
+            "size": size,
+            "throughput": amount / stats["seconds"] if stats["seconds"]
+                else float("inf"),
+            "unit": unit
+        }
+        results.append(stats)
+        ratio = f" x{size / stats['output_size']:.2f}" \
+            if stats.get("output_size") else ""
+        print(
+            f"{case:<22} {size:>12} {stats['throughput']:>14.1f} {unit:<10}"
+            f" {stats['seconds']:>10.4f} s {stats['peak_memory']:>14} B"
+            f"{ratio}"
+        )
+
+    for size in sizes:
+        text = generate_text(alphabet, size, rng)
+        for case, func in text_cases(alphabet, text).items():
+            if selected is None or case in selected:
+                report(case, size, "chars/s", size, measure(func, repeat))
+
+        # стиснення має сенс лише для текстових даних, тому файл
+        # складається з байтів UTF-8 згенерованого тексту
+        data = text.encode("utf-8")[:size]
+        for case, func in compression_cases(data).items():
+            if selected is None or case in selected:
+                report(case, size, "bytes/s", size, measure(func, repeat))
+        del text, data
+
+        data = generate_bytes(size, rng)
+        for case, func in file_cases(data).items():
+            if selected is None or case in selected:
+                report(case, size, "bytes/s", size, measure(func, repeat))
+        del data
+
+    for case, backend in (
+        ("detection", "memory"), ("detection_sqlite", "sqlite")
+    ):
+        if selected is not None and case not in selected:
+            continue
+        for history in histories:
+            requests = 1000
+            run = detection_case(history, requests, backend)
+            tracemalloc.start()
+            try:
+                run()
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+            seconds = min(run() for _ in range(repeat))
+            report(
+                case, history, "requests/s", requests,
+                {"seconds": seconds, "peak_memory": peak}
+            )
+
+    return results
+
+
+def find_regressions(
+    results: list[dict], baseline: list[dict], threshold: float
+) -> list[str]:
+    previous = {(r["case"], r["size"]): r for r in baseline}
+    regressions = []
+    for result in results:
+        if not (old := previous.get((result["case"], result["size"]))):
+            continue
+
+        if result["throughput"] < old["throughput"] * (1 - threshold):
+            regressions.append(
+                f"{result['case']} [{result['size']}]: пропускна здатність "
+                f"{result['throughput']:.1f} < {old['throughput']:.1f} "
+                f"{result['unit']}"
+            )
+        if result["peak_memory"] > old["peak_memory"] * (1 + threshold):
+            regressions.append(
+                f"{result['case']} [{result['size']}]: пікова пам'ять "
+                f"{result['peak_memory']} > {old['peak_memory']} B"
+            )
+    return regressions
+
+
+def parse_args(args: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Вимірювання швидкодії шифрів"
+    )
+    parser.add_argument(
+        "--sizes", default="1K,64K,1M,16M",
+        help="розміри вхідних даних через кому (символи або байти); "
+            "100M потребує кількох гігабайтів пам'яті, тому вмикається "
+            "лише явно"
+    )
+    parser.add_argument(
+        "--history", default="1000,10000,100000",
+        help="розміри історії запитів для детектора атак через кому"
+    )
+    parser.add_argument(
+        "--cases", default=None,
+        help="назви сценаріїв через кому (усі, якщо не вказано)"
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--settings", default=SETTINGS_PATH)
+    parser.add_argument(
+        "--output", default=None, help="файл для збереження результатів"
+    )
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--save-baseline", action="store_true",
+        help="зберегти результати як нову базову лінію"
+    )
+    parser.add_argument(
+        "--threshold", type=float, default=0.2,
+        help="допустиме відносне погіршення відносно базової лінії"
+    )
+    return parser.parse_args(args)
+
+
+def main(args: list[str] = None) -> int:
+    args = parse_args(args)
+    alphabet = load_alphabet(args.settings)
+    sizes = [parse_size(size) for size in args.sizes.split(",")]
+    histories = [parse_size(size) for size in args.history.split(",")]
+    selected = set(args.cases.split(",")) if args.cases else None
+
+    results = run_benchmarks(alphabet, sizes, histories, args.repeat, selected)
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "timestamp": datetime.now().isoformat()
+        },
+        "results": results
+    }
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(report, file, indent=4)
+
+    if args.save_baseline:
+        with open(args.baseline, "w") as file:
+            json.dump(report, file, indent=4)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        return 0
+
+    with open(args.baseline) as file:
+        baseline = json.load(file)["results"]
+
+    regressions = find_regressions(results, baseline, args.threshold)
+    for regression in regressions:
+        print(f"Регресія: {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import argparse
+import importlib
+import os
+import sys
+import time
+
+
+IMPORT_TIME_TARGET = 0.5
+worker = {}
+
+
+def parse_range(value: str) -> tuple[int, int | None]:
+    start, sep, end = value.partition(":")
+    if not sep:
+        raise argparse.ArgumentTypeError("Діапазон задається як START:END")
+    try:
+        return int(start or 0), int(end) if end else None
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Некоректний діапазон: {value}")
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Пакетне шифрування файлів без інтерфейсу Streamlit"
+    )
+    parser.add_argument("action", choices=["encode", "decode"])
+    parser.add_argument(
+        "paths", nargs="*",
+        help="файли або каталоги; якщо не вказано, читається stdin"
+    )
+    parser.add_argument(
+        "-m", "--mode", default="caesar",
+        choices=["caesar", "tabula_recta", "keyword", "file"]
+    )
+    parser.add_argument("-k", "--key", type=int, help="ключ шифру Цезаря")
+    parser.add_argument("-a", type=int, help="ключ A шифру Тритеміуса")
+    parser.add_argument("-b", type=int, help="ключ B шифру Тритеміуса")
+    parser.add_argument(
+        "-c", type=int, default=0, help="ключ C шифру Тритеміуса"
+    )
+    parser.add_argument("--keyword", help="ключове слово")
+    parser.add_argument(
+        "--use-index", action="store_true",
+        help="використовувати індекс для шифрування файлів"
+    )
+    parser.add_argument(
+        "--compress", choices=["zlib", "lzma"], default=None,
+        help="стискати файли перед шифруванням (розпаковувати після "
+            "розшифрування)"
+    )
+    parser.add_argument(
+        "--validate", action="store_true",
+        help="використовувати валідацію даних"
+    )
+    parser.add_argument(
+        "--range", type=parse_range, default=None, metavar="START:END",
+        help="обробити лише символи (байти) з позиціями [START:END)"
+    )
+    parser.add_argument("-o", "--output", help="каталог для результатів")
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="кількість процесів для обробки файлів"
+    )
+    parser.add_argument(
+        "--import-time", action="store_true",
+        help="вивести час імпорту модулів шифрування"
+    )
+    return parser
+
+
+def check_args(args: argparse.Namespace):
+    required = {
+        "caesar": ["key"],
+        "tabula_recta": ["a", "b"],
+        "keyword": ["keyword"],
+        "file": ["key"]
+    }[args.mode]
+    for name in required:
+        if getattr(args, name) is None:
+            raise ValueError(f"Необхідно вказати ключ --{name}")
+
+
+def load_alphabet(args: argparse.Namespace):
+    # налаштування алфавітів потрібні лише для текстових режимів
+    if args.mode == "file":
+        return None
+
+    import settings
+
+    return settings.load_alphabet(settings.settings_path())
+
+
+def create_text_coder(args: argparse.Namespace, alphabet):
+    import components
+
+    keys = {
+        "caesar": {"k": args.key},
+        "tabula_recta": {"a": args.a, "b": args.b, "c": args.c},
+        "keyword": {"keyword": args.keyword}
+    }[args.mode]
+    return components.TextStreamCoder(
+        alphabet, args.mode, args.action, args.validate, **keys
+    )
+
+
+def code_binary(args: argparse.Namespace, src, dst) -> int:
+    import components
+
+    func = {
+        "encode": components.CaesarCipher.encode_caesar,
+        "decode": components.CaesarCipher.decode_caesar
+    }[args.action]
+    return components.FileCode.code_file(
+        src, dst, args.key, 256, func,
+        args.action if args.use_index else None,
+        compression=args.compress,
+        action=args.action
+    )
+
+
+def code_range(
+    args: argparse.Namespace, alphabet, src, dst, src_path: str
+):
+    # позиційний ключ обчислюється одразу для START, тому попередня
+    # частина файлу не шифрується й не розшифровується
+    import components
+
+    start, end = args.range
+    if args.mode == "file":
+        func = {
+            "encode": components.CaesarCipher.encode_caesar,
+            "decode": components.CaesarCipher.decode_caesar
+        }[args.action]
+        dst.write(components.FileCode.code_range(
+            src, args.key, 256, func,
+            args.action if args.use_index else None, start, end
+        ))
+        return
+
+    index = components.TextOffsetIndex.load(src_path)
+    text = index.read(src, start, end)
+    result = create_text_coder(args, alphabet).code_at(text, start)
+    dst.write(result.encode("utf-8", "surrogatepass"))
+
+
+def init_worker(args: argparse.Namespace, compiled: dict | None):
+    import components
+
+    alphabet = None
+    if compiled is not None:
+        alphabet = components.AlphabetCode.from_compiled(compiled)
+    worker.update({"args": args, "alphabet": alphabet})
+
+
+def process_file(paths: tuple[str, str]) -> str:
+    src_path, dst_path = paths
+    args, alphabet = worker["args"], worker["alphabet"]
+    if os.path.dirname(dst_path):
+        os.makedirs(os.path.dirname(dst_path), exist_ok=True)
+
+    if args.range is not None:
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            code_range(args, alphabet, src, dst, src_path)
+    elif args.mode == "file":
+        with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+            code_binary(args, src, dst)
+    else:
+        coder = create_text_coder(args, alphabet)
+        with open(src_path, encoding="utf-8", newline="") as src, \
+                open(dst_path, "w", encoding="utf-8", newline="") as dst:
+            coder.code_file(src, dst)
+    return dst_path
+
+
+def collect_jobs(
+    paths: list[str], output: str | None, action: str
+) -> list[tuple[str, str]]:
+    jobs = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, files in os.walk(path):
+                for name in sorted(files):
+                    # індекси позицій символів належать самим файлам
+                    if name.endswith(".idx.npy"):
+                        continue
+                    src = os.path.join(root, name)
+                    relative = os.path.relpath(src, path)
+                    base = output or f"{path.rstrip(os.sep)}_{action}"
+                    jobs.append((src, os.path.join(base, relative)))
+        elif os.path.isfile(path):
+            name = os.path.basename(path)
+            base = output or os.path.dirname(path)
+            jobs.append((path, os.path.join(base, f"{action}_{name}")))
+        else:
+            raise FileNotFoundError(path)
+    return jobs
+
+
+def process_stdin(args: argparse.Namespace):
+    alphabet = load_alphabet(args)
+    if args.mode == "file":
+        code_binary(args, sys.stdin.buffer, sys.stdout.buffer)
+    else:
+        create_text_coder(args, alphabet).code_file(sys.stdin, sys.stdout)
+    sys.stdout.flush()
+
+
+def process_paths(args: argparse.Namespace):
+    jobs = collect_jobs(args.paths, args.output, args.action)
+    # налаштування перевіряються до створення пулу, інакше помилка
+    # в ініціалізації процесу показується лише як BrokenProcessPool
+    alphabet = load_alphabet(args)
+    if len(jobs) == 1 or args.workers == 1:
+        worker.update({"args": args, "alphabet": alphabet})
+        for job in jobs:
+            print(process_file(job))
+        return
+
+    import concurrent.futures
+
+    compiled = alphabet.to_compiled() if alphabet is not None else None
+    with concurrent.futures.ProcessPoolExecutor(
+        args.workers, initializer=init_worker, initargs=(args, compiled)
+    ) as executor:
+        for dst_path in executor.map(process_file, jobs):
+            print(dst_path)
+
+
+def measure_import_time() -> float:
+    start = time.perf_counter()
+    importlib.import_module("components")
+    importlib.import_module("settings")
+    return time.perf_counter() - start
+
+
+def main(argv: list[str] = None) -> int:
+    args = build_parser().parse_intermixed_args(argv)
+
+    if args.import_time:
+        seconds = measure_import_time()
+        print(f"Час імпорту: {seconds:.3f} с (ціль {IMPORT_TIME_TARGET} с)")
+        return 0 if seconds <= IMPORT_TIME_TARGET else 1
+
+    try:
+        check_args(args)
+        if args.range is not None and args.paths in ([], ["-"]):
+            raise ValueError("Діапазон можна задати лише для файлів")
+        if args.compress and args.mode != "file":
+            raise ValueError("Стиснення доступне лише в режимі file")
+        if args.compress and args.range is not None:
+            raise ValueError("Діапазон не підтримується зі стисненням")
+        if not args.paths or args.paths == ["-"]:
+            process_stdin(args)
+        else:
+            process_paths(args)
+    except Exception as ex_:
+        print(f"Помилка: {ex_}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,16 @@
+import codecs
+import collections
+import concurrent.futures
 from datetime import datetime, timedelta
+import functools
+import hashlib
+import lzma
+import mmap
 import numpy as np
-import pandas as pd
+import os
+import tempfile
 import typing
+import zlib
 
 
 class TabulaRecta:
@@ -19,6 +28,23 @@ class TabulaRecta:
         return a * p ** 2 + b * p + c
 
 
+    @staticmethod
+    def generate_keystream(
+        a: int, b: int, c: int, p: np.ndarray, l: np.ndarray
+    ) -> np.ndarray:
+        # ключі одразу зводяться за модулем потужності алфавіту кожного
+        # символу, тому великі a, b, c і p не виходять за межі int64
+        k = np.empty(len(p), dtype=np.int64)
+        for n in np.unique(l).tolist():
+            mask = l == n
+            pn = p[mask] % n
+            if c == 0:
+                k[mask] = (a % n * pn + b % n) % n
+            else:
+                k[mask] = ((a % n * pn % n) * pn + b % n * pn + c % n) % n
+        return k
+
+
 class CaesarCipher:
     @staticmethod
     def encode_caesar(c: int, l: int, k: int) -> int:
@@ -31,6 +57,9 @@ class CaesarCipher:
 
 
 class AlphabetCode:
+    BLOCK_SIZE = 1 << 18
+
+
     def __init__(self, valid_chars: str | list[str] = None, **alphabets):
         self.chars = {}
         self.alphabets = {}
@@ -42,6 +71,11 @@ class AlphabetCode:
             self.chars |= codes
             self.alphabets |= {name: (alphabet, char_list_len)}
 
+        self.translation_table = functools.lru_cache(maxsize=64)(
+            self.make_translation_table
+        )
+        self.compile_chars()
+
 
     @staticmethod
     def form_alphabet(
@@ -76,12 +110,7 @@ class AlphabetCode:
             "upper": "isupper"
         }[case]
 
-        result = ""
-        for c in chars:
-            if c.__getattribute__(func)():
-                result += c
-
-        return result
+        return "".join(c for c in chars if c.__getattribute__(func)())
 
 
     @staticmethod
@@ -95,6 +124,155 @@ class AlphabetCode:
             return nc.lower()
         else:
             return nc.upper()
+
+
+    def char_arrays(self) -> dict[str, np.ndarray]:
+        names = {name: i for i, name in enumerate(self.alphabets)}
+        items = list(self.chars.items())
+        return {
+            "points": np.array(
+                [ord(c) for c, _ in items], dtype=np.uint32
+            ),
+            "codes": np.array([v[0] for _, v in items], dtype=np.int64),
+            "lens": np.array([v[1] for _, v in items], dtype=np.int64),
+            "names": np.array(
+                [names[v[2]] for _, v in items], dtype=np.intp
+            ),
+            "lower": np.array([c.islower() for c, _ in items], dtype=bool)
+        }
+
+
+    def compile_chars(self):
+        self.index_chars(**self.char_arrays())
+
+
+    def index_chars(
+        self, 
+        points: np.ndarray, 
+        codes: np.ndarray, 
+        lens: np.ndarray, 
+        names: np.ndarray, 
+        lower: np.ndarray
+    ):
+        offsets = []
+        lower_chars, upper_chars = [], []
+        for alphabet, _ in self.alphabets.values():
+            offsets.append(len(lower_chars))
+            lower_chars += [c.lower() for c in alphabet]
+            upper_chars += [c.upper() for c in alphabet]
+
+        order = np.argsort(points, kind="stable")
+        self.char_points = points[order]
+        self.char_codes = codes[order]
+        self.char_lens = lens[order]
+        self.char_offsets = np.array(offsets, dtype=np.int64)[names[order]]
+        self.char_upper = (~lower[order]).astype(np.intp)
+        # останній елемент завжди -1, до нього зводяться всі символи
+        # з кодами, більшими за коди символів алфавітів
+        size = int(self.char_points.max()) + 2 if len(points) else 1
+        self.char_lookup = np.full(size, -1, dtype=np.int32)
+        self.char_lookup[self.char_points] = np.arange(len(points))
+
+        self.alphabet_lens = np.array(
+            [l for _, l in self.alphabets.values()], dtype=np.int64
+        )
+        self.case_chars = [lower_chars, upper_chars]
+        if all(len(c) == 1 for c in lower_chars + upper_chars):
+            self.case_points = np.array(
+                [
+                    [ord(c) for c in lower_chars], 
+                    [ord(c) for c in upper_chars]
+                ], 
+                dtype=np.uint32
+            ).reshape(2, -1)
+        else:
+            self.case_points = None
+
+
+    def to_compiled(self) -> dict[str, np.ndarray]:
+        return self.char_arrays() | {
+            "alphabet_names": np.array(list(self.alphabets), dtype=str),
+            "alphabet_chars": np.array(
+                [c for alphabet, _ in self.alphabets.values() 
+                 for c in alphabet], 
+                dtype=str
+            ),
+            "alphabet_lens": self.alphabet_lens,
+            # рядок зберігається як скаляр, список — як масив
+            "valid_chars": np.array(
+                self.valid_chars if isinstance(self.valid_chars, str) 
+                else list(self.valid_chars), 
+                dtype=str
+            )
+        }
+
+
+    @staticmethod
+    def from_compiled(data: typing.Mapping[str, np.ndarray]) \
+            -> "AlphabetCode":
+        # відновлення без form_alphabet, використовується робочими
+        # процесами cli, які отримують алфавіт від батьківського процесу
+        alphabet = AlphabetCode.__new__(AlphabetCode)
+        names = data["alphabet_names"].tolist()
+        chars = data["alphabet_chars"].tolist()
+        alphabet.alphabets, start = {}, 0
+        for name, l in zip(names, data["alphabet_lens"].tolist()):
+            alphabet.alphabets[name] = (chars[start:start + l], l)
+            start += l
+
+        valid_chars = data["valid_chars"]
+        alphabet.valid_chars = str(valid_chars) if valid_chars.ndim == 0 \
+            else valid_chars.tolist()
+
+        points, codes, lens, char_names, lower = (
+            data[key] for key in ("points", "codes", "lens", "names", "lower")
+        )
+        alphabet.chars = {
+            chr(p): (code, l, names[n])
+            for p, code, l, n in zip(
+                points.tolist(), codes.tolist(), 
+                lens.tolist(), char_names.tolist()
+            )
+        }
+        alphabet.translation_table = functools.lru_cache(maxsize=64)(
+            alphabet.make_translation_table
+        )
+        alphabet.index_chars(points, codes, lens, char_names, lower)
+        return alphabet
+
+
+    def to_code_array(
+        self, text: str
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        points = np.frombuffer(
+            text.encode("utf-32-le", "surrogatepass"), dtype=np.uint32
+        )
+        ids = self.char_lookup[
+            np.minimum(points, len(self.char_lookup) - 1)
+        ]
+        index = np.flatnonzero(ids >= 0)
+        return points, index, ids[index]
+
+
+    def from_code_array(
+        self, 
+        points: np.ndarray, 
+        index: np.ndarray, 
+        ids: np.ndarray, 
+        ncodes: np.ndarray
+    ) -> str:
+        rows = self.char_upper[ids]
+        cols = self.char_offsets[ids] + ncodes
+
+        if self.case_points is not None:
+            points = points.copy()
+            points[index] = self.case_points[rows, cols]
+            return points.tobytes().decode("utf-32-le", "surrogatepass")
+
+        result = list(points.tobytes().decode("utf-32-le", "surrogatepass"))
+        for i, row, col in zip(index.tolist(), rows.tolist(), cols.tolist()):
+            result[i] = self.case_chars[row][col]
+        return "".join(result)
     
 
     def code_by_multiple_key_with_tabula_recta(
@@ -104,37 +282,33 @@ class AlphabetCode:
         b: int, 
         action: typing.Literal["decode", "encode"],
         c: int = 0, 
-        use_data_validation = False
+        use_data_validation = False,
+        start: int = 0
     ) -> str:
         if a < 1 or b < 1:
             raise ValueError("Ключі не повинні бути меншими за 1")
         
         if c < 0:
             raise ValueError("Ключ c не повинен бути менши за 0")
-        elif c == 0:
-            gen_func = TabulaRecta.generate_by_linear
-        elif c > 0:
-            gen_func = TabulaRecta.generate_by_nonlinear
 
         func = {
             "encode": CaesarCipher.encode_caesar,
             "decode": CaesarCipher.decode_caesar
         }[action]
-        
-        result = ""
-        for i, ch in enumerate(text):
-            if v := self.chars.get(ch):
-                code, l, name = v
-                k = gen_func(a=a, b=b, p=i, c=c)
-                ncode = func(code, l, k)
-                nc: str = self.alphabets[name][0][ncode]
-                result += self.choose_case(ch, nc)
-            elif use_data_validation and ch not in self.valid_chars:
-                raise ValueError(f"Некоректний символ: {ch}")
-            else:
-                result += ch
 
-        return result
+        if use_data_validation:
+            self.validate_text(text)
+
+        def code_block(block: str, position: int) -> str:
+            points, index, ids = self.to_code_array(block)
+            lens = self.char_lens[ids]
+            keys = TabulaRecta.generate_keystream(
+                a, b, c, index + position, lens
+            )
+            ncodes = func(self.char_codes[ids], lens, keys)
+            return self.from_code_array(points, index, ids, ncodes)
+
+        return self.code_blocks(text, start, code_block)
 
 
     def code_by_word_with_tabula_recta(
@@ -142,7 +316,8 @@ class AlphabetCode:
         text: str,
         keyword: str, 
         action: typing.Literal["decode", "encode"],
-        use_data_validation = False
+        use_data_validation = False,
+        start: int = 0
     ) -> str:
         kwl = len(keyword)
         if kwl < 1:
@@ -154,62 +329,280 @@ class AlphabetCode:
             "encode": CaesarCipher.encode_caesar,
             "decode": CaesarCipher.decode_caesar
         }[action]
-        
-        result = ""
-        for i, c in enumerate(text):
-            if not (kwv := self.chars.get(keyword[i % kwl])):
+
+        kcodes = self.keyword_to_codes(keyword)
+
+        if use_data_validation:
+            self.validate_text(text)
+
+        def code_block(block: str, position: int) -> str:
+            points, index, ids = self.to_code_array(block)
+            keys = kcodes[(index + position) % kwl]
+            ncodes = func(self.char_codes[ids], self.char_lens[ids], keys)
+            return self.from_code_array(points, index, ids, ncodes)
+
+        return self.code_blocks(text, start, code_block)
+
+
+    def code_blocks(
+        self, 
+        text: str, 
+        start: int, 
+        code_block: typing.Callable[[str, int], str]
+    ) -> str:
+        # проміжні масиви займають десятки байтів на символ, тому текст
+        # кодується блоками фіксованого розміру, а ключ кожного блоку
+        # зсувається на його позицію в тексті
+        size = self.BLOCK_SIZE
+        if len(text) <= size:
+            return code_block(text, start)
+        return "".join(
+            code_block(text[i:i + size], start + i)
+            for i in range(0, len(text), size)
+        )
+
+
+    def keyword_to_codes(self, keyword: str) -> np.ndarray:
+        kcodes = []
+        for c in keyword:
+            if not (v := self.chars.get(c)):
                 raise ValueError("Нема такого символу в доступному алфавіті")
+            kcodes.append(v[0])
+        return np.array(kcodes, dtype=np.int64)
 
-            if v := self.chars.get(c):
-                code, l, name = v
-                kcode, _, _ = kwv
-                ncode = func(code, l, kcode)
-                nc: str = self.alphabets[name][0][ncode]
-                result += self.choose_case(c, nc)
-            elif use_data_validation and c not in self.valid_chars:
-                raise ValueError(f"Некоректний символ: {c}")
-            else:
-                result += c
 
-        return result
+    def make_translation_table(self, k: int, func) -> dict[int, str]:
+        table = {}
+        for c, (code, l, name) in self.chars.items():
+            nc: str = self.alphabets[name][0][func(code, l, k)]
+            table[ord(c)] = self.choose_case(c, nc)
+        return table
+
+
+    def validate_text(self, text: str):
+        invalid = set(text).difference(self.chars, self.valid_chars)
+        if not invalid:
+            return
+        for c in text:
+            if c in invalid:
+                raise ValueError(f"Некоректний символ: {c}")
 
 
     def code_with_caesar_cypher(
         self, text: str, k: int, func, use_data_validation = False
     ) -> str:
+        self.validate_caesar_key(k)
+        
+        if use_data_validation:
+            self.validate_text(text)
+
+        return text.translate(self.translation_table(k, func))
+
+
+    def validate_caesar_key(self, k: int):
         if k < 1:
             raise ValueError("Ключ повинен бути більшим за 0")
 
-        lens = np.array([l for _, l in self.alphabets.values()])
-        if not (lens > k).all():
+        if not (self.alphabet_lens > k).all():
             raise ValueError(
                 "Ключ повинен бути меншим за потужність алфавіту"
             )
-        
-        result = ""
-        for c in text:
-            if v := self.chars.get(c):
-                code, l, name = v
-                ncode = func(code, l, k)
-                nc: str = self.alphabets[name][0][ncode]
-                result += self.choose_case(c, nc)
-            elif use_data_validation and c not in self.valid_chars:
-                raise ValueError(f"Некоректний символ: {c}")
+
+
+    def code_batch(
+        self,
+        texts: typing.Sequence[str],
+        keys: typing.Sequence,
+        action: typing.Literal["decode", "encode"],
+        mode: typing.Literal["caesar", "tabula_recta", "keyword"] = "caesar",
+        use_data_validation = False
+    ) -> list[list[str]]:
+        # keys: числа для шифру Цезаря, кортежі (a, b) або (a, b, c) для
+        # шифру Тритеміуса, ключові слова; результат[i][j] — текст i,
+        # закодований ключем j
+        func = {
+            "encode": CaesarCipher.encode_caesar,
+            "decode": CaesarCipher.decode_caesar
+        }[action]
+        texts, keys = list(texts), list(keys)
+
+        if mode == "caesar":
+            for k in keys:
+                self.validate_caesar_key(k)
+        elif mode == "tabula_recta":
+            for key in keys:
+                a, b, c = (*key, 0)[:3]
+                if a < 1 or b < 1:
+                    raise ValueError("Ключі не повинні бути меншими за 1")
+                if c < 0:
+                    raise ValueError("Ключ c не повинен бути менши за 0")
+        elif mode == "keyword":
+            for keyword in keys:
+                if len(keyword) < 1:
+                    raise ValueError(
+                        "Довжина ключового слова повинна бути більшою за 0"
+                    )
+            kcodes = [self.keyword_to_codes(keyword) for keyword in keys]
+        else:
+            raise ValueError(f"Невідомий режим: {mode}")
+
+        # усі документи переводяться в коди одним масивом, а зсуви для всіх
+        # ключів обчислюються як двовимірний масив ключі × символи
+        text = "".join(texts)
+        if use_data_validation:
+            self.validate_text(text)
+        bounds = np.cumsum([0] + [len(t) for t in texts])
+        if not keys or not text:
+            return [[t] * len(keys) for t in texts]
+
+        points, index, ids = self.to_code_array(text)
+        codes, lens = self.char_codes[ids], self.char_lens[ids]
+        if mode == "caesar":
+            shifts = np.array(keys, dtype=np.int64)[:, None]
+        else:
+            # позиція символу рахується від початку свого документа
+            positions = index - bounds[
+                np.searchsorted(bounds, index, side="right") - 1
+            ]
+            if mode == "tabula_recta":
+                shifts = np.stack([
+                    TabulaRecta.generate_keystream(
+                        *(*key, 0)[:3], positions, lens
+                    )
+                    for key in keys
+                ])
             else:
-                result += c
+                shifts = np.stack([
+                    kc[positions % len(kc)] for kc in kcodes
+                ])
+        ncodes = func(codes, lens, shifts)
 
-        return result
+        if self.case_points is not None:
+            coded = np.repeat(points[None, :], len(keys), axis=0)
+            coded[:, index] = self.case_points[
+                self.char_upper[ids], self.char_offsets[ids] + ncodes
+            ]
+            rows = coded.tobytes().decode("utf-32-le", "surrogatepass")
+            rows = [
+                rows[j * len(text):(j + 1) * len(text)]
+                for j in range(len(keys))
+            ]
+        else:
+            rows = [
+                self.from_code_array(points, index, ids, row) for row in ncodes
+            ]
+
+        return [
+            [row[bounds[i]:bounds[i + 1]] for row in rows]
+            for i in range(len(texts))
+        ]
     
 
+class TextStreamCoder:
+    CHUNK_SIZE = 1 << 20
+
+
+    def __init__(
+        self,
+        alphabet: AlphabetCode,
+        mode: typing.Literal["caesar", "tabula_recta", "keyword"],
+        action: typing.Literal["decode", "encode"],
+        use_data_validation = False,
+        start: int = 0,
+        **keys
+    ):
+        self.alphabet = alphabet
+        self.mode = mode
+        self.action = action
+        self.use_data_validation = use_data_validation
+        self.keys = keys
+        self.position = start
+
+        # порожній рядок перевіряє ключі ще до першої частини тексту
+        self.code("")
+
+
+    def code(self, chunk: str) -> str:
+        if self.mode == "caesar":
+            func = {
+                "encode": CaesarCipher.encode_caesar,
+                "decode": CaesarCipher.decode_caesar
+            }[self.action]
+            result = self.alphabet.code_with_caesar_cypher(
+                chunk, func=func, 
+                use_data_validation=self.use_data_validation, 
+                **self.keys
+            )
+        elif self.mode == "tabula_recta":
+            result = self.alphabet.code_by_multiple_key_with_tabula_recta(
+                chunk, action=self.action, 
+                use_data_validation=self.use_data_validation, 
+                start=self.position, 
+                **self.keys
+            )
+        elif self.mode == "keyword":
+            result = self.alphabet.code_by_word_with_tabula_recta(
+                chunk, action=self.action, 
+                use_data_validation=self.use_data_validation, 
+                start=self.position, 
+                **self.keys
+            )
+        else:
+            raise ValueError(f"Невідомий режим: {self.mode}")
+
+        # позиція символу переноситься між частинами, тому результат
+        # збігається з одноразовим викликом
+        self.position += len(chunk)
+        return result
+
+
+    def code_at(self, chunk: str, start: int) -> str:
+        # ключ залежить лише від позиції символу, тому довільний фрагмент
+        # кодується без обробки попереднього тексту й без зміни позиції потоку
+        if start < 0:
+            raise ValueError("Позиція не повинна бути меншою за 0")
+        position = self.position
+        self.position = start
+        try:
+            return self.code(chunk)
+        finally:
+            self.position = position
+
+
+    def code_stream(
+        self, chunks: typing.Iterable[str]
+    ) -> typing.Iterator[str]:
+        for chunk in chunks:
+            yield self.code(chunk)
+
+
+    @staticmethod
+    def read_chunks(
+        file: typing.TextIO, chunk_size: int = CHUNK_SIZE
+    ) -> typing.Iterator[str]:
+        while chunk := file.read(chunk_size):
+            yield chunk
+
+
+    def code_file(
+        self, 
+        src: typing.TextIO, 
+        dst: typing.TextIO, 
+        chunk_size: int = CHUNK_SIZE
+    ) -> int:
+        size = 0
+        for chunk in self.code_stream(self.read_chunks(src, chunk_size)):
+            dst.write(chunk)
+            size += len(chunk)
+        return size
+
+
 class FileCode:
+    CHUNK_SIZE = 1 << 22
+
+
     @staticmethod
-    def code(
-        file: bytes, 
-        k: int, 
-        l: int, 
-        func, 
-        use_index: typing.Literal["encode", "decode"] = None,
-    ) -> bytes:
+    def validate_key(k: int, l: int):
         if k < 1:
             raise ValueError("Ключ повинен бути більшим за 0")
         if l < 1:
@@ -218,26 +611,543 @@ class FileCode:
             raise ValueError(
                 "Ключ повинен бути меншим за потужність набору даних"
             )
+
+
+    @staticmethod
+    def code(
+        file: bytes, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        start: int = 0
+    ) -> bytearray:
+        FileCode.validate_key(k, l)
         
-        result = []
-        for i, c in enumerate(file):
-            n = c
-            if use_index == "encode":
-                n += i
-            elif use_index == "decode":
-                n -= i
-            result.append(func(n, l, k))
-        return bytes(result)
+        # numpy пише результат прямо в bytearray частинами code_into, тому
+        # немає ні копії через tobytes, ні проміжних масивів на весь файл
+        data = FileCode.as_byte_array(file)
+        return FileCode.code_into(
+            data, k, l, func, use_index, 
+            out=bytearray(len(data)), start=start
+        )
+    
+
+    @staticmethod
+    def code_into(
+        buffer, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        out = None,
+        start: int = 0,
+        chunk_size: int = CHUNK_SIZE
+    ):
+        FileCode.validate_key(k, l)
+        if chunk_size < 1:
+            raise ValueError("Розмір частини повинен бути більшим за 0")
+
+        # без out буфер змінюється на місці й повертається той самий об'єкт
+        data = FileCode.as_byte_array(buffer)
+        target = FileCode.as_byte_array(buffer if out is None else out)
+        if not target.flags.writeable:
+            raise ValueError("Буфер результату доступний лише для читання")
+        if len(target) != len(data):
+            raise ValueError(
+                "Розмір буфера результату не збігається з розміром даних"
+            )
+
+        # обробка частинами обмежує розмір проміжних масивів режиму індексу
+        for i in range(0, len(data), chunk_size):
+            FileCode.code_array(
+                data[i:i + chunk_size], 
+                target[i:i + chunk_size], 
+                k, l, func, use_index, start + i
+            )
+
+        return buffer if out is None else out
+    
+
+    @staticmethod
+    def as_byte_array(buffer) -> np.ndarray:
+        if isinstance(buffer, np.ndarray):
+            if buffer.dtype != np.uint8:
+                raise ValueError("Масив повинен мати тип uint8")
+            if not buffer.flags.c_contiguous:
+                raise ValueError("Масив повинен займати неперервну пам'ять")
+            return buffer.reshape(-1)
+        return np.frombuffer(buffer, dtype=np.uint8)
+    
+
+    @staticmethod
+    def code_parallel(
+        file: bytes, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        workers: int = None,
+        chunk_size: int = CHUNK_SIZE,
+        out = None,
+        start: int = 0
+    ):
+        FileCode.validate_key(k, l)
+        if chunk_size < 1:
+            raise ValueError("Розмір частини повинен бути більшим за 0")
+
+        # без out результат повертається в новому bytearray без копіювання
+        data = FileCode.as_byte_array(file)
+        result = bytearray(len(data)) if out is None else out
+        target = FileCode.as_byte_array(result)
+        if not target.flags.writeable:
+            raise ValueError("Буфер результату доступний лише для читання")
+        if len(target) != len(data):
+            raise ValueError(
+                "Розмір буфера результату не збігається з розміром даних"
+            )
+
+        # numpy звільняє GIL під час обчислень, тому потоки працюють
+        # паралельно й пишуть кожен у свою частину спільного буфера
+        with concurrent.futures.ThreadPoolExecutor(workers) as executor:
+            futures = [
+                executor.submit(
+                    FileCode.code_array, 
+                    data[i:i + chunk_size], 
+                    target[i:i + chunk_size], 
+                    k, l, func, use_index, start + i
+                )
+                for i in range(0, len(data), chunk_size)
+            ]
+            for future in futures:
+                future.result()
+
+        return result
+    
+
+    @staticmethod
+    def code_array(
+        data: np.ndarray, 
+        out: np.ndarray, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        start: int = 0
+    ):
+        if use_index not in ("encode", "decode"):
+            table = FileCode.make_table(k, l, func)
+            FileCode.check_range(table, data)
+            np.take(table.astype(np.uint8), data, out=out)
+        else:
+            result = func(
+                FileCode.shift_by_index(data, use_index, start), l, k
+            )
+            FileCode.check_range(result)
+            out[:] = result
+    
+
+    @staticmethod
+    def code_stream(
+        chunks: typing.Iterable[bytes], 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        start: int = 0
+    ) -> typing.Iterator[bytearray]:
+        FileCode.validate_key(k, l)
+
+        # індекс байта переноситься між частинами, тому результат
+        # збігається з одноразовим викликом code
+        for chunk in chunks:
+            yield FileCode.code(chunk, k, l, func, use_index, start)
+            start += len(chunk)
+    
+
+    @staticmethod
+    def read_chunks(
+        file: typing.BinaryIO, chunk_size: int = CHUNK_SIZE
+    ) -> typing.Iterator[bytes]:
+        try:
+            view = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (AttributeError, OSError, ValueError):
+            view = None
+
+        if view is None:
+            while chunk := file.read(chunk_size):
+                yield chunk
+            return
+
+        with view:
+            for i in range(file.tell(), len(view), chunk_size):
+                yield view[i:i + chunk_size]
+        file.seek(0, os.SEEK_END)
+    
+
+    @staticmethod
+    def code_file(
+        src: typing.BinaryIO, 
+        dst: typing.BinaryIO, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        chunk_size: int = CHUNK_SIZE,
+        compression: typing.Literal["zlib", "lzma"] = None,
+        action: typing.Literal["encode", "decode"] = "encode"
+    ) -> int:
+        size = 0
+        chunks = Compression.wrap(
+            FileCode.read_chunks(src, chunk_size), action, compression,
+            lambda chunks: FileCode.code_stream(
+                chunks, k, l, func, use_index
+            )
+        )
+        for chunk in chunks:
+            dst.write(chunk)
+            size += len(chunk)
+        return size
     
 
+    @staticmethod
+    def code_range(
+        src: typing.BinaryIO | bytes, 
+        k: int, 
+        l: int, 
+        func, 
+        use_index: typing.Literal["encode", "decode"] = None,
+        start: int = 0,
+        end: int = None
+    ) -> bytearray:
+        if start < 0 or (end is not None and end < start):
+            raise ValueError("Некоректний діапазон даних")
+
+        if hasattr(src, "seek"):
+            src.seek(start)
+            data = src.read() if end is None else src.read(end - start)
+        else:
+            data = memoryview(src)[start:end]
+        return FileCode.code(data, k, l, func, use_index, start)
+    
+
+    @staticmethod
+    def make_table(k: int, l: int, func) -> np.ndarray:
+        # func застосовується до всього масиву байтів одразу, тому повинна
+        # складатися лише з арифметичних операцій (як у CaesarCipher)
+        return func(np.arange(256, dtype=np.int64), l, k)
+    
+
+    @staticmethod
+    def shift_by_index(
+        data: np.ndarray, 
+        use_index: typing.Literal["encode", "decode"],
+        start: int = 0
+    ) -> np.ndarray:
+        index = np.arange(start, start + len(data), dtype=np.int64)
+        if use_index == "encode":
+            return data + index
+        elif use_index == "decode":
+            return data - index
+        raise ValueError(f"Невідомий режим індексу: {use_index}")
+    
+
+    @staticmethod
+    def check_range(values: np.ndarray, data: np.ndarray = None):
+        invalid = (values < 0) | (values > 255)
+        if data is not None and invalid.any():
+            invalid = invalid[data]
+        if invalid.any():
+            raise ValueError("bytes must be in range(0, 256)")
+    
+
+class Compression:
+    METHODS = ("zlib", "lzma")
+    ZLIB_LEVEL = 6
+    LZMA_PRESET = 6
+
+
+    @staticmethod
+    def compress_stream(
+        chunks: typing.Iterable[bytes], method: typing.Literal["zlib", "lzma"]
+    ) -> typing.Iterator[bytes]:
+        if method == "zlib":
+            compressor = zlib.compressobj(Compression.ZLIB_LEVEL)
+        elif method == "lzma":
+            compressor = lzma.LZMACompressor(preset=Compression.LZMA_PRESET)
+        else:
+            raise ValueError(f"Невідомий метод стиснення: {method}")
+
+        for chunk in chunks:
+            if data := compressor.compress(chunk):
+                yield data
+        yield compressor.flush()
+
+
+    @staticmethod
+    def decompress_stream(
+        chunks: typing.Iterable[bytes], 
+        method: typing.Literal["zlib", "lzma"],
+        chunk_size: int = FileCode.CHUNK_SIZE
+    ) -> typing.Iterator[bytes]:
+        if method == "zlib":
+            decompressor, error = zlib.decompressobj(), zlib.error
+        elif method == "lzma":
+            decompressor, error = lzma.LZMADecompressor(), lzma.LZMAError
+        else:
+            raise ValueError(f"Невідомий метод стиснення: {method}")
+
+        # неправильний ключ дає пошкоджений потік, тому помилка розпакування
+        # зазвичай означає неправильний ключ або метод стиснення
+        extra = "Неможливо розпакувати дані: зайві дані після кінця потоку"
+        try:
+            for chunk in chunks:
+                # дані після кінця потоку означають пошкоджений або склеєний
+                # файл, тому вони не відкидаються мовчки
+                if decompressor.eof:
+                    if len(chunk):
+                        raise ValueError(extra)
+                    continue
+                # результат обмежується chunk_size, щоб невелика частина
+                # стиснених даних не розгорталася в пам'яті повністю
+                while True:
+                    if data := decompressor.decompress(chunk, chunk_size):
+                        yield data
+                    if decompressor.unused_data:
+                        raise ValueError(extra)
+                    if method == "zlib":
+                        chunk = decompressor.unconsumed_tail
+                        if not chunk:
+                            break
+                    else:
+                        chunk = b""
+                        if decompressor.needs_input or decompressor.eof:
+                            break
+            if method == "zlib" and (data := decompressor.flush()):
+                yield data
+        except (error, EOFError) as ex_:
+            raise ValueError(f"Неможливо розпакувати дані: {ex_}")
+        if not decompressor.eof:
+            raise ValueError("Неможливо розпакувати дані: неповний потік")
+
+
+    @staticmethod
+    def wrap(
+        chunks: typing.Iterable[bytes],
+        action: typing.Literal["encode", "decode"],
+        method: typing.Literal["zlib", "lzma"] | None,
+        code: typing.Callable[
+            [typing.Iterable[bytes]], typing.Iterator[bytes]
+        ]
+    ) -> typing.Iterator[bytes]:
+        # дані стискаються перед шифруванням і розпаковуються після
+        # розшифрування, тому шифр обробляє вже стиснені байти
+        if method is None:
+            return code(chunks)
+        if action == "encode":
+            return code(Compression.compress_stream(chunks, method))
+        return Compression.decompress_stream(code(chunks), method)
+
+
+class TextOffsetIndex:
+    STEP = 1 << 16
+    # розмір і час зміни файлу, кількість символів і крок перед зміщеннями
+    HEADER = 4
+
+
+    def __init__(self, offsets: np.ndarray, size: int, step: int = STEP):
+        # байтові зміщення символів з номерами 0, step, 2 * step, ...
+        # у файлі UTF-8, де символи мають різну довжину в байтах
+        self.offsets = offsets
+        self.size = size
+        self.step = step
+
+
+    @staticmethod
+    def build(
+        file: typing.BinaryIO, 
+        step: int = STEP, 
+        chunk_size: int = FileCode.CHUNK_SIZE
+    ) -> "TextOffsetIndex":
+        if step < 1:
+            raise ValueError("Крок індексу повинен бути більшим за 0")
+
+        offsets = [np.zeros(0, dtype=np.int64)]
+        size = offset = 0
+        file.seek(0)
+        for chunk in FileCode.read_chunks(file, chunk_size):
+            data = np.frombuffer(chunk, dtype=np.uint8)
+            # символ починається з кожного байта, що не є продовженням
+            starts = np.flatnonzero((data & 0xC0) != 0x80)
+            offsets.append(starts[(-size) % step::step] + offset)
+            size += len(starts)
+            offset += len(data)
+        return TextOffsetIndex(np.concatenate(offsets), size, step)
+
+
+    @staticmethod
+    def index_path(path: str) -> str:
+        return f"{path}.idx.npy"
+
+
+    @staticmethod
+    def load(path: str, step: int = STEP) -> "TextOffsetIndex":
+        # індекс будується під час першого звернення й зберігається поруч
+        # із файлом, тому наступні діапазони не читають файл повністю
+        stat = os.stat(path)
+        index_path = TextOffsetIndex.index_path(path)
+        try:
+            data = np.load(index_path, allow_pickle=False)
+            header = data[:TextOffsetIndex.HEADER].tolist()
+            if data.dtype == np.int64 and len(header) == 4 \
+                    and header[:2] == [stat.st_size, stat.st_mtime_ns] \
+                    and header[3] == step:
+                return TextOffsetIndex(
+                    data[TextOffsetIndex.HEADER:], header[2], step
+                )
+        except (OSError, ValueError):
+            pass
+
+        with open(path, "rb") as file:
+            index = TextOffsetIndex.build(file, step)
+        index.save(index_path, stat)
+        return index
+
+
+    def save(self, path: str, stat: os.stat_result):
+        header = np.array(
+            [stat.st_size, stat.st_mtime_ns, self.size, self.step], 
+            dtype=np.int64
+        )
+        tmp_path = None
+        try:
+            # запис через тимчасовий файл, щоб інші процеси не прочитали
+            # частково записаний індекс
+            fd, tmp_path = tempfile.mkstemp(
+                suffix=".npy", dir=os.path.dirname(path) or None
+            )
+            with os.fdopen(fd, "wb") as file:
+                np.save(file, np.concatenate([header, self.offsets]))
+            os.replace(tmp_path, path)
+        except OSError:
+            # індекс лише пришвидшує читання, тому помилка запису не
+            # заважає обробці
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+    def read(
+        self, file: typing.BinaryIO, start: int, end: int = None
+    ) -> str:
+        end = self.size if end is None else min(end, self.size)
+        if start < 0 or end < start:
+            raise ValueError("Некоректний діапазон даних")
+        if start == end:
+            return ""
+
+        block = start // self.step * self.step
+        file.seek(int(self.offsets[start // self.step]))
+        # символ UTF-8 займає не більше 4 байтів, а неповний останній
+        # символ відкидає інкрементальний декодер
+        decoder = codecs.getincrementaldecoder("utf-8")()
+        text = decoder.decode(file.read((end - block) * 4))
+        return text[start - block:end - block]
+
+
+class MemoryRequestStore:
+    def __init__(self):
+        # запити в порядку надходження та лічильники часових міток для
+        # кожної пари (дія, хеш тексту); старші за вікно записи видаляються
+        self._history: collections.deque[
+            tuple[datetime, tuple[str, bytes]]
+        ] = collections.deque()
+        self._requests: dict[
+            tuple[str, bytes], collections.deque[datetime]
+        ] = {}
+
+
+    def drop_before(self, border: datetime):
+        while self._history and self._history[0][0] < border:
+            _, req = self._history.popleft()
+            timestamps = self._requests[req]
+            timestamps.popleft()
+            if not timestamps:
+                del self._requests[req]
+
+
+    def count(
+        self, req: tuple[str, bytes], border: datetime, dt: datetime
+    ) -> int:
+        self.drop_before(border)
+        timestamps = self._requests.get(req)
+        if not timestamps:
+            return 0
+
+        if timestamps[0] >= border and timestamps[-1] <= dt:
+            return len(timestamps)
+        return sum(border <= ts <= dt for ts in timestamps)
+
+
+    def insert(self, req: tuple[str, bytes], dt: datetime, border: datetime):
+        self.drop_before(border)
+        self._history.append((dt, req))
+        self._requests.setdefault(req, collections.deque()).append(dt)
+
+
+    @property
+    def size(self) -> int:
+        return len(self._history)
+
+
 class AttackTabulaRectaDetection:
-    def __init__(self, tries: int, drop_tries: int) -> None:
+    def __init__(
+        self, 
+        tries: int, 
+        drop_tries: int, 
+        store = None, 
+        block_time: timedelta = None
+    ) -> None:
         self._blocked = False
+        # без block_time блокування діє до перезапуску, як в інтерфейсі;
+        # сервіс задає його, щоб блокування знімалося з часом
+        self._block_time = block_time
+        self._blocked_at: datetime | None = None
         self._tries = tries
         self._drop_tries = drop_tries
-        self._history = pd.DataFrame(columns=[
-            "text", "key", "action", "timestamp"
-        ])
+        self._window = timedelta(seconds=drop_tries)
+        # сховище можна спільно використовувати кількома детекторами,
+        # наприклад усіма сесіями та процесами через storage.SQLiteRequestStore
+        self._store = store if store is not None else MemoryRequestStore()
+
+
+    @staticmethod
+    def hash_text(text: str) -> bytes:
+        return hashlib.blake2b(
+            text.encode("utf-8", "surrogatepass"), digest_size=16
+        ).digest()
+
+
+    @staticmethod
+    def hash_file(
+        file: typing.BinaryIO, chunk_size: int = FileCode.CHUNK_SIZE
+    ) -> bytes:
+        # для тексту в UTF-8 збігається з hash_text, але файл читається
+        # частинами, а не повністю в пам'ять
+        text_hash = hashlib.blake2b(digest_size=16)
+        while chunk := file.read(chunk_size):
+            text_hash.update(chunk)
+        return text_hash.digest()
+
+
+    def count_requests(
+        self, 
+        text_hash: bytes, 
+        action: typing.Literal["encode", "decode"],
+        dt: datetime
+    ) -> int:
+        return self._store.count(
+            (action, text_hash), dt - self._window, dt
+        )
 
 
     def check_request(
@@ -247,16 +1157,19 @@ class AttackTabulaRectaDetection:
         action: typing.Literal["encode", "decode"],
         dt: datetime
     ):
-        req_df = self._history[
-            (self._history["action"] == action) &
-            (self._history["timestamp"].between(
-                dt - timedelta(seconds=self._drop_tries), dt
-            )) &
-            (self._history["text"] == text) 
-        ]
-        req_df_len = len(req_df) 
-        if req_df_len >= self._tries:
+        self.check_hash(self.hash_text(text), key, action, dt)
+
+
+    def check_hash(
+        self, 
+        text_hash: bytes, 
+        key: typing.Any, 
+        action: typing.Literal["encode", "decode"],
+        dt: datetime
+    ):
+        if self.count_requests(text_hash, action, dt) >= self._tries:
             self._blocked = True
+            self._blocked_at = dt
             raise OSError(
                 "Досягнуто ліміт на розшифрування. Інтерфейс заблоковано"
             )
@@ -269,8 +1182,30 @@ class AttackTabulaRectaDetection:
         action: typing.Literal["encode", "decode"],
         dt: datetime
     ):
-        if self._blocked:
+        self.insert_hash(self.hash_text(text), key, action, dt)
+
+
+    def insert_hash(
+        self, 
+        text_hash: bytes, 
+        key: typing.Any,
+        action: typing.Literal["encode", "decode"],
+        dt: datetime
+    ):
+        if self.is_blocked(dt):
             raise OSError(
                 "Досягнуто ліміт на розшифрування. Інтерфейс заблоковано"
             )
-        self._history.loc[len(self._history)] = (text, key, action, dt)
\ No newline at end of file
+        self._store.insert((action, text_hash), dt, dt - self._window)
+
+
+    def is_blocked(self, dt: datetime) -> bool:
+        if self._blocked and self._block_time is not None \
+                and dt - self._blocked_at >= self._block_time:
+            self._blocked = False
+        return self._blocked
+
+
+    @property
+    def history_size(self) -> int:
+        return self._store.size
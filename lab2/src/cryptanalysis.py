@@ -0,0 +1,482 @@
+import numpy as np
+import typing
+
+import components
+
+
+SAMPLE_SIZE = 1 << 18
+FREQUENCIES = {
+    "en": {
+        "a": 8.167, "b": 1.492, "c": 2.782, "d": 4.253, "e": 12.702,
+        "f": 2.228, "g": 2.015, "h": 6.094, "i": 6.966, "j": 0.153,
+        "k": 0.772, "l": 4.025, "m": 2.406, "n": 6.749, "o": 7.507,
+        "p": 1.929, "q": 0.095, "r": 5.987, "s": 6.327, "t": 9.056,
+        "u": 2.758, "v": 0.978, "w": 2.360, "x": 0.150, "y": 1.974,
+        "z": 0.074
+    },
+    "uk": {
+        "а": 7.2, "б": 1.7, "в": 5.2, "г": 1.6, "ґ": 0.01, "д": 3.5,
+        "е": 4.7, "є": 0.8, "ж": 0.9, "з": 2.3, "и": 6.1, "і": 5.7,
+        "ї": 0.6, "й": 1.1, "к": 3.8, "л": 3.5, "м": 3.1, "н": 6.5,
+        "о": 9.4, "п": 2.9, "р": 4.7, "с": 4.1, "т": 5.5, "у": 4.0,
+        "ф": 0.3, "х": 1.2, "ц": 0.6, "ч": 1.8, "ш": 0.9, "щ": 0.5,
+        "ь": 2.9, "ю": 0.8, "я": 2.9
+    }
+}
+
+
+def reference_frequencies(
+    alphabet: components.AlphabetCode,
+    frequencies: dict[str, dict[str, float]] = None
+) -> dict[str, np.ndarray]:
+    frequencies = frequencies or FREQUENCIES
+
+    result = {}
+    for name, (chars, l) in alphabet.alphabets.items():
+        table = frequencies.get(name, {})
+        p = np.array([table.get(c.lower(), 0.0) for c in chars], dtype=float)
+        # для алфавітів без довідкових частот розподіл рівномірний, тому
+        # вони не впливають на порядок ключів
+        if not p.sum():
+            p = np.ones(l)
+        p = np.maximum(p, p.sum() * 1e-6)
+        result[name] = p / p.sum()
+    return result
+
+
+def alphabet_slices(alphabet: components.AlphabetCode) -> dict[str, slice]:
+    result, start = {}, 0
+    for name, (_, l) in alphabet.alphabets.items():
+        result[name] = slice(start, start + l)
+        start += l
+    return result
+
+
+def to_slots(
+    alphabet: components.AlphabetCode, text: str
+) -> tuple[np.ndarray, np.ndarray]:
+    _, index, ids = alphabet.to_code_array(text)
+    return index, alphabet.char_offsets[ids] + alphabet.char_codes[ids]
+
+
+def count_codes(alphabet: components.AlphabetCode, text: str) -> np.ndarray:
+    _, slots = to_slots(alphabet, text)
+    total = sum(l for _, l in alphabet.alphabets.values())
+    return np.bincount(slots, minlength=total)
+
+
+def chi_squared(
+    counts: np.ndarray, expected: np.ndarray, keys: np.ndarray
+) -> np.ndarray:
+    # рядок k містить гістограму тексту, розшифрованого ключем k;
+    # counts може мати додаткові виміри попереду (наприклад, стовпці)
+    l = counts.shape[-1]
+    shifted = counts[..., (np.arange(l) + keys[:, None]) % l]
+    e = counts.sum(axis=-1)[..., None, None] * expected
+    with np.errstate(divide="ignore", invalid="ignore"):
+        scores = ((shifted - e) ** 2 / e).sum(axis=-1)
+    return np.nan_to_num(scores)
+
+
+def rank_caesar_keys(
+    alphabet: components.AlphabetCode,
+    text: str,
+    frequencies: dict[str, dict[str, float]] = None
+) -> list[tuple[int, float]]:
+    lens = [l for _, l in alphabet.alphabets.values()]
+    if not lens:
+        return []
+
+    keys = np.arange(1, min(lens))
+    counts = count_codes(alphabet, text)
+    expected = reference_frequencies(alphabet, frequencies)
+
+    scores = np.zeros(len(keys))
+    for name, part in alphabet_slices(alphabet).items():
+        scores += chi_squared(counts[part], expected[name], keys)
+
+    order = np.argsort(scores, kind="stable")
+    return [(int(keys[i]), float(scores[i])) for i in order]
+
+
+def count_columns(
+    index: np.ndarray, slots: np.ndarray, periods: list[int], total: int
+) -> np.ndarray:
+    # гістограми всіх стовпців усіх періодів однією пачкою: рядки
+    # періоду P займають P послідовних рядків результату
+    starts = np.cumsum([0] + periods[:-1])
+    keys = np.concatenate([
+        (start + index % period) * total + slots
+        for start, period in zip(starts.tolist(), periods)
+    ])
+    return np.bincount(keys, minlength=sum(periods) * total)\
+        .reshape(-1, total)
+
+
+def index_of_coincidence(
+    index: np.ndarray, 
+    slots: np.ndarray, 
+    periods: list[int], 
+    total: int,
+    batch_size: int = 1 << 24
+) -> np.ndarray:
+    result = []
+    step = max(1, batch_size // max(len(slots), 1))
+    for i in range(0, len(periods), step):
+        batch = periods[i:i + step]
+        counts = count_columns(index, slots, batch, total)
+        n = counts.sum(axis=1)
+        starts = np.cumsum([0] + batch[:-1])
+        same = np.add.reduceat((counts * (counts - 1)).sum(axis=1), starts)
+        pairs = np.add.reduceat(n * (n - 1), starts)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            result.append(np.nan_to_num(same / pairs))
+    return np.concatenate(result) if result else np.empty(0)
+
+
+def repeat_distances(
+    points: np.ndarray, 
+    index: np.ndarray, 
+    size: int = 3, 
+    limit: int = 1 << 16
+) -> np.ndarray:
+    if len(points) < size:
+        return np.empty(0, dtype=np.int64)
+
+    # повтори шукаються лише серед n-грам, що повністю складаються з
+    # літер, бо інші символи не шифруються
+    letters = np.zeros(len(points), dtype=bool)
+    letters[index] = True
+    n = len(points) - size + 1
+    valid = np.ones(n, dtype=bool)
+    grams = np.zeros(n, dtype=np.uint64)
+    for i in range(size):
+        valid &= letters[i:i + n]
+        grams = grams * np.uint64(1 << 21) + points[i:i + n]
+
+    positions = np.flatnonzero(valid)
+    order = np.argsort(grams[positions], kind="stable")
+    grams, positions = grams[positions][order], positions[order]
+    same = grams[1:] == grams[:-1]
+    return (positions[1:] - positions[:-1])[same][:limit]
+
+
+def rank_keyword_lengths(
+    alphabet: components.AlphabetCode, 
+    text: str, 
+    max_period: int = 100,
+    sample_size: int = SAMPLE_SIZE
+) -> list[tuple[int, float]]:
+    points, index, ids = alphabet.to_code_array(text)
+    slots = alphabet.char_offsets[ids] + alphabet.char_codes[ids]
+    return rank_periods(
+        alphabet, points, index, slots, max_period, sample_size
+    )
+
+
+def rank_periods(
+    alphabet: components.AlphabetCode, 
+    points: np.ndarray, 
+    index: np.ndarray, 
+    slots: np.ndarray, 
+    max_period: int,
+    sample_size: int = SAMPLE_SIZE
+) -> list[tuple[int, float]]:
+    if not len(slots) or max_period < 1:
+        return []
+
+    # для оцінки довжини ключа достатньо початку тексту, решта
+    # потрібна лише для відновлення самого ключа
+    if len(slots) > sample_size:
+        index, slots = index[:sample_size], slots[:sample_size]
+        points = points[:index[-1] + 1]
+
+    total = sum(l for _, l in alphabet.alphabets.values())
+    periods = list(range(1, max_period + 1))
+    ioc = index_of_coincidence(index, slots, periods, total)
+
+    # індекс збігу випадкового тексту з урахуванням частки кожного алфавіту
+    counts = np.bincount(slots, minlength=total)
+    random_ioc = sum(
+        (counts[part].sum() / len(slots)) ** 2 / (part.stop - part.start)
+        for part in alphabet_slices(alphabet).values()
+    )
+    scores = np.maximum(ioc - random_ioc, 0)
+
+    # частка відстаней між повторами, кратних періоду, підсилює справжню
+    # довжину ключа відносно її кратних
+    distances = repeat_distances(points, index)
+    if len(distances):
+        periods_array = np.array(periods)
+        scores *= 1 + (distances[None, :] % periods_array[:, None] == 0)\
+            .mean(axis=1)
+
+    order = np.argsort(-scores, kind="stable")
+    return [(periods[i], float(scores[i])) for i in order]
+
+
+def recover_keyword(
+    alphabet: components.AlphabetCode,
+    index: np.ndarray,
+    slots: np.ndarray,
+    period: int,
+    frequencies: dict[str, dict[str, float]] = None
+) -> tuple[str, float]:
+    total = sum(l for _, l in alphabet.alphabets.values())
+    lens = [l for _, l in alphabet.alphabets.values()]
+    keys = np.arange(max(lens))
+    counts = count_columns(index, slots, [period], total)
+    expected = reference_frequencies(alphabet, frequencies)
+
+    scores = np.zeros((period, len(keys)))
+    for name, part in alphabet_slices(alphabet).items():
+        scores += chi_squared(counts[:, part], expected[name], keys)
+    shifts = scores.argmin(axis=1)
+
+    keyword = "".join(key_char(alphabet, int(s)) for s in shifts)
+    return keyword, float(scores[np.arange(period), shifts].sum())
+
+
+def key_char(alphabet: components.AlphabetCode, code: int) -> str:
+    for chars, l in alphabet.alphabets.values():
+        if code < l:
+            c = chars[code]
+            if (v := alphabet.chars.get(c.lower())) and v[0] == code:
+                return c.lower()
+            return c
+    raise ValueError(f"Нема символу з кодом {code} в доступному алфавіті")
+
+
+def shortest_period(keyword: str) -> str:
+    for size in range(1, len(keyword)):
+        if len(keyword) % size == 0 \
+                and keyword[:size] * (len(keyword) // size) == keyword:
+            return keyword[:size]
+    return keyword
+
+
+def rank_keywords(
+    alphabet: components.AlphabetCode, 
+    text: str, 
+    max_period: int = 100, 
+    candidates: int = 5,
+    frequencies: dict[str, dict[str, float]] = None,
+    sample_size: int = SAMPLE_SIZE
+) -> list[tuple[str, float]]:
+    points, index, ids = alphabet.to_code_array(text)
+    slots = alphabet.char_offsets[ids] + alphabet.char_codes[ids]
+    periods = rank_periods(
+        alphabet, points, index, slots, max_period, sample_size
+    )
+
+    # ключові слова впорядковані за оцінкою довжини, разом з кожним
+    # повертається хі-квадрат розшифрованого тексту
+    result = {}
+    for period, _ in periods[:candidates]:
+        keyword, score = recover_keyword(
+            alphabet, index, slots, period, frequencies
+        )
+        result.setdefault(shortest_period(keyword), score)
+    return list(result.items())
+
+
+def known_plaintext_equations(
+    alphabet: components.AlphabetCode,
+    text: str,
+    plaintext: str,
+    start: int = 0
+) -> dict[int, tuple[np.ndarray, np.ndarray]]:
+    cipher = text[start:start + len(plaintext)]
+    if start < 0 or len(cipher) != len(plaintext):
+        raise ValueError("Відомий текст виходить за межі шифротексту")
+
+    _, index, ids = alphabet.to_code_array(plaintext)
+    _, cindex, cids = alphabet.to_code_array(cipher)
+    letters = np.zeros(len(plaintext), dtype=bool)
+    letters[index] = True
+    cletters = np.zeros(len(plaintext), dtype=bool)
+    cletters[cindex] = True
+    if (letters != cletters).any() or any(
+        p != c for p, c, is_letter in zip(plaintext, cipher, letters)
+        if not is_letter
+    ):
+        raise ValueError("Відомий текст не відповідає шифротексту")
+
+    # літера шифротексту повинна належати тому ж алфавіту й регістру
+    if (alphabet.char_offsets[ids] != alphabet.char_offsets[cids]).any() \
+            or (alphabet.char_upper[ids] != alphabet.char_upper[cids]).any():
+        raise ValueError("Відомий текст не відповідає шифротексту")
+
+    lens = alphabet.char_lens[ids]
+    residues = (alphabet.char_codes[cids] - alphabet.char_codes[ids]) % lens
+    positions = index + start
+    return {
+        l: (positions[lens == l], residues[lens == l])
+        for l in np.unique(lens).tolist()
+    }
+
+
+def factorize(n: int) -> dict[int, int]:
+    result, p = {}, 2
+    while p * p <= n:
+        while n % p == 0:
+            result[p] = result.get(p, 0) + 1
+            n //= p
+        p += 1
+    if n > 1:
+        result[n] = result.get(n, 0) + 1
+    return result
+
+
+def keystream_rows(positions: np.ndarray, q: int, keys: int) -> np.ndarray:
+    p = positions % q
+    columns = [p * p % q, p, np.ones_like(p)] if keys == 3 \
+        else [p, np.ones_like(p)]
+    return np.stack(columns, axis=1)
+
+
+def solve_mod_prime(
+    rows: np.ndarray, rhs: np.ndarray, prime: int
+) -> np.ndarray | None:
+    rows, rhs = rows % prime, rhs % prime
+    n = rows.shape[1]
+    pivot_rows = []
+    for col in range(n):
+        candidates = [
+            i for i in np.flatnonzero(rows[:, col]).tolist() 
+            if i not in pivot_rows
+        ]
+        if not candidates:
+            continue
+        i = candidates[0]
+        inv = pow(int(rows[i, col]), -1, prime)
+        rows[i] = rows[i] * inv % prime
+        rhs[i] = rhs[i] * inv % prime
+        factors = rows[:, col].copy()
+        factors[i] = 0
+        rows = (rows - factors[:, None] * rows[i]) % prime
+        rhs = (rhs - factors * rhs[i]) % prime
+        pivot_rows.append(i)
+
+    # нульовий рядок з ненульовою правою частиною: розв'язку немає
+    if ((rows == 0).all(axis=1) & (rhs != 0)).any():
+        return np.empty((0, n), dtype=np.int64)
+    if len(pivot_rows) < n:
+        return None
+    return rhs[pivot_rows].reshape(1, n)
+
+
+def search_residues(
+    equations: list[tuple[np.ndarray, np.ndarray, int]], 
+    q: int, 
+    keys: int,
+    chunk_size: int = 8
+) -> np.ndarray:
+    candidates = np.indices((q,) * keys).reshape(keys, -1).T
+    for positions, residues, modulus in equations:
+        rows = keystream_rows(positions, q, keys)
+        for i in range(0, len(rows), chunk_size):
+            values = candidates @ rows[i:i + chunk_size].T
+            matches = (
+                values % modulus == residues[i:i + chunk_size] % modulus
+            ).all(axis=1)
+            candidates = candidates[matches]
+            if not len(candidates):
+                return candidates
+    return candidates
+
+
+def unique_keystreams(
+    candidates: np.ndarray, q: int, keys: int
+) -> np.ndarray:
+    # ключовий потік за модулем q періодичний з періодом q, тому ключі з
+    # однаковими значеннями на позиціях 0..q-1 еквівалентні
+    streams = candidates @ keystream_rows(np.arange(q), q, keys).T % q
+    _, first = np.unique(streams, axis=0, return_index=True)
+    return candidates[np.sort(first)]
+
+
+def combine_residues(
+    u: np.ndarray, m1: int, v: np.ndarray, m2: int
+) -> np.ndarray:
+    # усі пари розв'язків, тому кількість результатів — len(u) * len(v)
+    u = np.repeat(u, len(v), axis=0)
+    v = np.tile(v, (len(u) // len(v), 1))
+    inv = pow(m1, -1, m2)
+    return u + m1 * ((v - u) * inv % m2)
+
+
+def solve_tabula_recta_keys(
+    alphabet: components.AlphabetCode,
+    text: str,
+    plaintext: str,
+    start: int = 0,
+    keys: typing.Literal[2, 3] = 3,
+    limit: int = 100
+) -> list[tuple[int, int, int]]:
+    if keys not in (2, 3):
+        raise ValueError("Кількість ключів повинна бути 2 або 3")
+
+    equations = known_plaintext_equations(alphabet, text, plaintext, start)
+    if not equations:
+        raise ValueError("Відомий текст не містить літер алфавіту")
+
+    # рівняння за модулем потужності алфавіту розкладаються на рівняння
+    # за степенями простих чисел, які розв'язуються окремо
+    by_prime: dict[int, list[tuple[np.ndarray, np.ndarray, int]]] = {}
+    for l, (positions, residues) in equations.items():
+        for prime, power in factorize(l).items():
+            by_prime.setdefault(prime, []).append(
+                (positions, residues, prime ** power)
+            )
+
+    # ключ потрібен за модулем потужностей усіх алфавітів шифротексту,
+    # а не лише тих, літери яких є у відомому тексті
+    _, _, ids = alphabet.to_code_array(text)
+    required: dict[int, int] = {}
+    for l in np.unique(alphabet.char_lens[ids]).tolist():
+        for prime, power in factorize(l).items():
+            required[prime] = max(required.get(prime, 1), prime ** power)
+
+    results = []
+    for prime, q in required.items():
+        prime_equations = by_prime.get(prime, [])
+        result = None
+        if q == prime and prime_equations:
+            rows = np.concatenate([
+                keystream_rows(positions, q, keys) 
+                for positions, _, _ in prime_equations
+            ])
+            rhs = np.concatenate([r for _, r, _ in prime_equations])
+            result = solve_mod_prime(rows, rhs, prime)
+        if result is None:
+            result = unique_keystreams(
+                search_residues(prime_equations, q, keys), q, keys
+            )
+        if not len(result):
+            return []
+        results.append((result, q))
+
+    # модуль без рівнянь або з недостатньою кількістю незалежних рівнянь
+    # дає кілька рівноправних ключів, тому повертаються всі кандидати
+    # або помилка, якщо їх більше за limit
+    total = int(np.prod([len(result) for result, _ in results]))
+    if total > limit:
+        ambiguous = [str(q) for result, q in results if len(result) > 1]
+        raise ValueError(
+            "Відомий текст не визначає ключ однозначно за модулем "
+            f"{', '.join(ambiguous)}: кандидатів {total}, більше за ліміт "
+            f"{limit}"
+        )
+
+    modulus, solutions = 1, np.zeros((1, keys), dtype=np.int64)
+    for result, q in results:
+        solutions = combine_residues(solutions, modulus, result, q)
+        modulus *= q
+
+    # нульові ключі замінюються модулем, бо шифр вимагає a, b >= 1, а
+    # нульовий c перемкнув би шифр на лінійний ключ
+    solutions = np.where(solutions == 0, modulus, solutions)
+    if keys == 2:
+        return [(int(a), int(b), 0) for a, b in solutions.tolist()]
+    return [(int(a), int(b), int(c)) for a, b, c in solutions.tolist()]
@@ -0,0 +1,204 @@
+import collections
+import concurrent.futures
+import os
+import tempfile
+import threading
+import time
+import typing
+import uuid
+
+import components
+
+
+class JobCancelled(Exception):
+    pass
+
+
+class Job:
+    def __init__(self, name: str, total: int):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.total = total
+        self.processed = 0
+        self.status: typing.Literal[
+            "pending", "running", "done", "failed", "cancelled"
+        ] = "pending"
+        self.result: typing.Any = None
+        self.error: str | None = None
+        self.future: concurrent.futures.Future | None = None
+        self.finished_at: float | None = None
+        self._cancel = threading.Event()
+
+
+    @property
+    def progress(self) -> float:
+        if not self.total:
+            return 1.0 if self.finished else 0.0
+        return min(self.processed / self.total, 1.0)
+
+
+    @property
+    def finished(self) -> bool:
+        return self.status in ("done", "failed", "cancelled")
+
+
+    def cancel(self):
+        self._cancel.set()
+        if self.future is not None and self.future.cancel():
+            self.status = "cancelled"
+            self.finished_at = time.monotonic()
+
+
+    def advance(self, size: int):
+        # викликається між частинами даних, тому скасування спрацьовує
+        # не пізніше ніж після обробки поточної частини
+        if self._cancel.is_set():
+            raise JobCancelled()
+        self.processed += size
+
+
+    @property
+    def result_size(self) -> int:
+        if hasattr(self.result, "fileno"):
+            # позиція файлу не змінюється, бо його може читати завантаження
+            return os.fstat(self.result.fileno()).st_size
+        return len(self.result or b"")
+
+
+    def read_result(self) -> bytes | str:
+        if hasattr(self.result, "read"):
+            self.result.seek(0)
+            return self.result.read()
+        return self.result
+
+
+    def close(self):
+        if hasattr(self.result, "close"):
+            self.result.close()
+        self.result = None
+
+
+class JobManager:
+    def __init__(
+        self, workers: int = None, keep: int = 64, max_age: float = 3600
+    ):
+        self._executor = concurrent.futures.ThreadPoolExecutor(workers)
+        self._jobs: collections.OrderedDict[str, Job] = \
+            collections.OrderedDict()
+        self._keep = keep
+        self._max_age = max_age
+        self._lock = threading.Lock()
+
+
+    def submit(
+        self, name: str, total: int, func: typing.Callable, *args
+    ) -> Job:
+        job = Job(name, total)
+        with self._lock:
+            self._jobs[job.id] = job
+            self.drop_finished()
+        job.future = self._executor.submit(self.run, job, func, *args)
+        return job
+
+
+    def get(self, job_id: str) -> Job | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+
+    def remove(self, job_id: str):
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+        if job is not None:
+            job.cancel()
+            if job.finished:
+                job.close()
+
+
+    def drop_finished(self):
+        border = time.monotonic() - self._max_age
+        finished = [job for job in self._jobs.values() if job.finished]
+        for i, job in enumerate(finished):
+            # тимчасові файли результатів звільняються, коли завершених
+            # завдань забагато або їх давно не забирали
+            if i < len(finished) - self._keep or (
+                job.finished_at is not None and job.finished_at < border
+            ):
+                del self._jobs[job.id]
+                job.close()
+
+
+    def cleanup(self):
+        with self._lock:
+            self.drop_finished()
+
+
+    @staticmethod
+    def run(job: Job, func: typing.Callable, *args):
+        job.status = "running"
+        try:
+            job.result = func(job, *args)
+        except JobCancelled:
+            job.status = "cancelled"
+        except Exception as ex_:
+            job.error = str(ex_)
+            job.status = "failed"
+        else:
+            job.status = "done"
+        finally:
+            job.finished_at = time.monotonic()
+
+
+def code_file(
+    job: Job,
+    data: bytes,
+    k: int,
+    func,
+    use_index: typing.Literal["encode", "decode"] = None,
+    compression: typing.Literal["zlib", "lzma"] = None,
+    action: typing.Literal["encode", "decode"] = "encode",
+    chunk_size: int = components.FileCode.CHUNK_SIZE
+) -> typing.BinaryIO:
+    view = memoryview(data)
+
+    def chunks():
+        # прогрес рахується за вхідними даними, бо зі стисненням розмір
+        # результату відрізняється від розміру файлу
+        for i in range(0, len(view), chunk_size):
+            chunk = view[i:i + chunk_size]
+            yield chunk
+            job.advance(len(chunk))
+
+    result = tempfile.TemporaryFile(buffering=0)
+    try:
+        for chunk in components.Compression.wrap(
+            chunks(), action, compression,
+            lambda chunks: components.FileCode.code_stream(
+                chunks, k, 256, func, use_index
+            )
+        ):
+            result.write(chunk)
+    except BaseException:
+        result.close()
+        raise
+    return result
+
+
+def code_text(
+    job: Job,
+    coder: components.TextStreamCoder,
+    text: str,
+    chunk_size: int = components.TextStreamCoder.CHUNK_SIZE
+) -> typing.BinaryIO:
+    # результат пишеться на диск частинами, тому пам'ять не залежить
+    # від розміру тексту
+    result = tempfile.TemporaryFile(buffering=0)
+    try:
+        for i in range(0, len(text), chunk_size):
+            chunk = text[i:i + chunk_size]
+            result.write(coder.code(chunk).encode("utf-8", "surrogatepass"))
+            job.advance(len(chunk))
+    except BaseException:
+        result.close()
+        raise
+    return result
@@ -0,0 +1,109 @@
+import argparse
+import asyncio
+import sys
+import time
+import urllib.parse
+
+import numpy as np
+
+
+async def send_requests(
+    host: str,
+    port: int,
+    target: str,
+    body: bytes,
+    count: int,
+    latencies: list[float]
+) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    head = (
+        f"POST {target} HTTP/1.1\r\n"
+        f"Host: {host}\r\n"
+        f"Content-Length: {len(body)}\r\n\r\n"
+    ).encode("latin-1")
+    errors = 0
+    try:
+        for _ in range(count):
+            start = time.perf_counter()
+            writer.write(head + body)
+            response = await reader.readuntil(b"\r\n\r\n")
+            status = int(response.split(b" ", 2)[1])
+            size = 0
+            for line in response.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    size = int(line.split(b":")[1])
+            await reader.readexactly(size)
+            latencies.append(time.perf_counter() - start)
+            errors += status != 200
+    finally:
+        writer.close()
+    return errors
+
+
+async def run(args: argparse.Namespace) -> dict:
+    url = urllib.parse.urlsplit(args.url)
+    target = url.path + (f"?{url.query}" if url.query else "")
+    body = (args.text * (args.size // len(args.text) + 1))[:args.size]\
+        .encode("utf-8")
+    latencies = []
+    per_connection = [
+        args.requests // args.connections
+        + (i < args.requests % args.connections)
+        for i in range(args.connections)
+    ]
+
+    start = time.perf_counter()
+    errors = await asyncio.gather(*(
+        send_requests(
+            url.hostname, url.port or 80, target, body, count, latencies
+        )
+        for count in per_connection if count
+    ))
+    seconds = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    return {
+        "requests": len(latencies),
+        "errors": sum(errors),
+        "seconds": seconds,
+        "rps": len(latencies) / seconds if seconds else 0.0,
+        "p50": float(np.percentile(latencies, 50)) if len(latencies) else 0,
+        "p99": float(np.percentile(latencies, 99)) if len(latencies) else 0
+    }
+
+
+def parse_args(args: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Навантажувальне тестування локального HTTP-сервісу"
+    )
+    parser.add_argument(
+        "url", nargs="?", 
+        default="http://127.0.0.1:8080/text/caesar/encode?k=3"
+    )
+    parser.add_argument("-c", "--connections", type=int, default=64)
+    parser.add_argument("-n", "--requests", type=int, default=10000)
+    parser.add_argument(
+        "--size", type=int, default=64, help="розмір тіла запиту в символах"
+    )
+    parser.add_argument("--text", default="Привіт, світе! Hello, world! ")
+    return parser.parse_args(args)
+
+
+def main(args: list[str] = None) -> int:
+    args = parse_args(args)
+    try:
+        stats = asyncio.run(run(args))
+    except OSError as ex_:
+        print(f"Помилка: {ex_}", file=sys.stderr)
+        return 1
+
+    print(
+        f"Запитів: {stats['requests']}, помилок: {stats['errors']}, "
+        f"час: {stats['seconds']:.2f} с, {stats['rps']:.0f} запитів/с, "
+        f"p50 {stats['p50'] * 1000:.2f} мс, p99 {stats['p99'] * 1000:.2f} мс"
+    )
+    return 0 if not stats["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,61 +1,241 @@
 from datetime import datetime
-import dotenv
-import json
+import functools
 import os
 import psutil
 
 import streamlit as st
 
 import components
+import jobs
+import metrics
+import results
+import settings
 
 
-def load_env():
-    try:
-        if not dotenv.load_dotenv():
-            raise FileNotFoundError("./.env")
-        
-        path = os.getenv("SETTINGS_PATH")
-        if not path:
-            raise ValueError(path)
-
-        with open(path) as file:
-            data = json.load(file)
-
-        alphabets = data["alphabets"]
-        valid_chars = data["valid_chars"]
-        alphabet = components.AlphabetCode(
-            valid_chars=valid_chars, **alphabets
-        )
-        detection = components.AttackTabulaRectaDetection(
-            tries=data["tries"],
-            drop_tries=data["drop_tries"]
-        )
-    except ValueError as ex_:
-        raise Exception(
-            "Необхідно внести шлях файлу налаштувань в SETTINGS_PATH"
+JOB_TEXT_SIZE = 1 << 20
+JOB_STATUSES = {
+    "pending": "в черзі",
+    "running": "виконується",
+    "done": "готово",
+    "failed": "помилка",
+    "cancelled": "скасовано"
+}
+
+
+@st.cache_resource(max_entries=1)
+def load_alphabet(path: str, version: int) -> components.AlphabetCode:
+    return settings.load_alphabet(path)
+
+
+def compute_text(
+    path: str,
+    version: int,
+    mode: str,
+    text: str,
+    action: str,
+    keys: tuple,
+    use_validation: bool
+) -> str:
+    alphabet = load_alphabet(path, version)
+    keys = dict(keys)
+
+    if mode == "caesar_cypher":
+        return alphabet.code_with_caesar_cypher(
+            text=text, 
+            func={
+                "encode": components.CaesarCipher.encode_caesar,
+                "decode": components.CaesarCipher.decode_caesar
+            }[action], 
+            use_data_validation=use_validation,
+            **keys
         )
-    except FileNotFoundError as ex_:
-        raise Exception(
-            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+    elif mode == "keyword":
+        return alphabet.code_by_word_with_tabula_recta(
+            text=text,
+            action=action,
+            use_data_validation=use_validation,
+            **keys
         )
-    except KeyError as ex_:
-        raise Exception(
-            f"Необхідно внести дані в змінну: {ex_}"
+    return alphabet.code_by_multiple_key_with_tabula_recta(
+        text=text,
+        action=action,
+        use_data_validation=use_validation,
+        **keys
+    )
+
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def code_text(
+    path: str,
+    version: int,
+    mode: str,
+    text: str,
+    action: str,
+    keys: tuple,
+    use_validation: bool
+) -> str:
+    # алфавіт і результати спільні для всіх сесій та перебудовуються,
+    # коли змінюється файл налаштувань
+    return compute_text(
+        path, version, mode, text, action, keys, use_validation
+    )
+
+
+def run_text(text: str, **kwargs) -> str:
+    # великі результати не кешуються, інакше кеш тримав би в пам'яті
+    # до 256 копій незалежно від їхнього розміру
+    func = code_text if len(text) <= results.SPILL_SIZE else compute_text
+    return func(text=text, **kwargs)
+
+
+@st.cache_resource
+def get_result_store() -> results.ResultStore:
+    return results.ResultStore()
+
+
+def show_result(result: str, file_name: str):
+    text, truncated = results.preview(result)
+    if len(result) > results.SPILL_SIZE:
+        store = get_result_store()
+        path = store.save(result, ".txt")
+        size = os.path.getsize(path)
+        data = functools.partial(store.read, path)
+    else:
+        size = len(result.encode("utf-8", "surrogatepass"))
+        data = result
+
+    st.title("Результат")
+    st.write(text)
+    if truncated:
+        st.caption(
+            f"Показано перші {len(text)} з {len(result)} символів, "
+            f"розмір результату: {results.format_size(size)}"
         )
-    except TypeError as ex_:
-        raise Exception(
-            f"Значення alphabets повинно бути словником"
+    else:
+        st.caption(f"Розмір результату: {results.format_size(size)}")
+    st.download_button("Завантажити", data, file_name)
+
+
+@st.cache_resource
+def get_job_manager() -> jobs.JobManager:
+    return jobs.JobManager()
+
+
+def submit_job(name: str, total: int, func, *args):
+    job = get_job_manager().submit(name, total, func, *args)
+    st.session_state.setdefault("jobs", []).append(job.id)
+
+
+def submit_text_job(
+    mode: str, text: str, action: str, keys: dict, use_validation: bool
+):
+    path = st.session_state["settings_path"]
+    coder = components.TextStreamCoder(
+        load_alphabet(path, settings.settings_version(path)),
+        mode,
+        action,
+        use_validation,
+        **keys
+    )
+    submit_job(f"{action}_data.txt", len(text), jobs.code_text, coder, text)
+
+
+@st.fragment(run_every=1)
+def show_jobs():
+    manager = get_job_manager()
+    manager.cleanup()
+    st.title("Завдання")
+
+    for job_id in list(st.session_state.get("jobs", [])):
+        if not (job := manager.get(job_id)):
+            st.session_state["jobs"].remove(job_id)
+            continue
+
+        st.progress(
+            job.progress, 
+            f"{job.name}: {job.processed} з {job.total} "
+            f"({JOB_STATUSES[job.status]})"
         )
+        c1, c2 = st.columns(2)
+        if job.status == "done":
+            c1.download_button(
+                "Завантажити", job.read_result, job.name, 
+                key=f"download_{job.id}",
+                help=f"Розмір результату: "
+                    f"{results.format_size(job.result_size)}"
+            )
+        elif job.status == "failed":
+            c1.error(f"Помилка: {job.error}")
+
+        if job.finished:
+            c2.button(
+                "Прибрати", key=f"remove_{job.id}", 
+                on_click=manager.remove, args=(job.id,)
+            )
+        else:
+            c2.button(
+                "Скасувати", key=f"cancel_{job.id}", on_click=job.cancel
+            )
+
+
+@st.cache_resource(max_entries=1)
+def configure_metrics(path: str, version: int) -> bool:
+    # метрики вмикаються підміною методів для всього процесу, тому ними
+    # керує файл налаштувань, а не перемикач окремої сесії
+    enabled = bool(settings.read_settings(path).get("metrics", False))
+    if enabled:
+        metrics.metrics.enable()
     else:
-        st.session_state.update({
-            "alphabet": alphabet,
-            "loaded": True,
-            "attack_tabula_recta_detection": detection
-        })
+        metrics.metrics.disable()
+    return enabled
+
+
+def show_metrics():
+    registry = metrics.metrics
+    st.title("Метрики")
+    if not registry.enabled:
+        st.caption(
+            "Збирання метрик вимкнено, увімкніть його параметром "
+            "\"metrics\": true у файлі налаштувань"
+        )
+        return
+
+    snapshot = registry.snapshot()
+    st.metric(
+        "Розмір історії детектора", snapshot["detector_history_size"]
+    )
+    st.dataframe([
+        {
+            "метод": label,
+            "виклики": item["calls"],
+            "помилки": item["errors"],
+            "p50, с": item["p50"],
+            "p95, с": item["p95"],
+            "швидкість": f"{item['throughput']:.0f} {item['unit']}/s"
+                if item["unit"] else "",
+        }
+        for label, item in snapshot["methods"].items()
+    ], hide_index=True)
+
+    c1, c2 = st.columns(2)
+    c1.download_button(
+        "Prometheus", registry.to_prometheus, "metrics.prom"
+    )
+    c2.download_button("JSON", registry.to_json, "metrics.json")
+    st.button("Скинути метрики", on_click=registry.reset)
+
+
+def load_env():
+    path = settings.settings_path()
+    detection = settings.create_detection(settings.read_settings(path))
+    st.session_state.update({
+        "settings_path": path,
+        "loaded": True,
+        "attack_tabula_recta_detection": detection
+    })
 
 
 def show_tabula_recta_text_coder():
-    alphabet: components.AlphabetCode = st.session_state["alphabet"]
     text: str = st.session_state.get("text") or ""
     use_validation = st.checkbox("Використовувати валідацію даних")
     selected = st.radio(
@@ -73,19 +253,16 @@ def show_tabula_recta_text_coder():
         b = st.number_input("B", min_value=1, step=1)
         keys = {"a": a, "b": b}
         skeys = (a, b)
-        func = alphabet.code_by_multiple_key_with_tabula_recta
     elif selected == "3-keys":
         a = st.number_input("A", min_value=1, step=1)
         b = st.number_input("B", min_value=1, step=1)
         c = st.number_input("C", min_value=1, step=1)
         keys = {"a": a, "b": b, "c": c}
         skeys = (a, b, c)
-        func = alphabet.code_by_multiple_key_with_tabula_recta
     elif selected == "keyword":
         keyword = st.text_input("Ключове слово")
         keys = {"keyword": keyword}
         skeys = keyword
-        func = alphabet.code_by_word_with_tabula_recta
 
     text = st.text_area("Текст", text)
     file = st.file_uploader("Завантажити файл", type=["txt"])
@@ -109,25 +286,30 @@ def show_tabula_recta_text_coder():
             action = "decode"
             detection.check_request(text, skeys, action, dt)
 
-        if encode_btn or decode_btn:
+        if (encode_btn or decode_btn) and len(text) > JOB_TEXT_SIZE:
+            detection.insert_request(text, skeys, action, dt)
+            submit_text_job(
+                "keyword" if selected == "keyword" else "tabula_recta",
+                text, action, keys, use_validation
+            )
+        elif encode_btn or decode_btn:
             detection.insert_request(text, skeys, action, dt)
-            result = func(
+            path = st.session_state["settings_path"]
+            result = run_text(
+                path=path,
+                version=settings.settings_version(path),
+                mode=selected,
                 text=text,
                 action=action,
-                use_data_validation=use_validation,
-                **keys
-            )
-            st.title("Результат")
-            st.write(result)
-            st.download_button(
-                "Завантажити", result, f"{action}_data.txt"
+                keys=tuple(keys.items()),
+                use_validation=use_validation
             )
+            show_result(result, f"{action}_data.txt")
     except Exception as ex_:
         st.error(f"Помилка: {ex_}")
 
 
 def show_caesar_cypher_text_coder():
-    alphabet: components.AlphabetCode = st.session_state["alphabet"]
     text: str = st.session_state.get("text") or ""
     use_validation = st.checkbox("Використовувати валідацію даних")
     key = st.number_input("Ключ", step=1, min_value=1)
@@ -143,24 +325,26 @@ def show_caesar_cypher_text_coder():
             st.session_state.update({"text": file.read().decode("utf-8")})
 
         if encode_btn:
-            func = components.CaesarCipher.encode_caesar
             action = "encode"
         elif decode_btn:
-            func = components.CaesarCipher.decode_caesar
             action = "decode"
 
-        if encode_btn or decode_btn:
-            result = alphabet.code_with_caesar_cypher(
-                text=text, 
-                k=key, 
-                func=func, 
-                use_data_validation=use_validation
+        if (encode_btn or decode_btn) and len(text) > JOB_TEXT_SIZE:
+            submit_text_job(
+                "caesar", text, action, {"k": key}, use_validation
             )
-            st.title("Результат")
-            st.write(result)
-            st.download_button(
-                "Завантажити", result, f"{action}_data.txt"
+        elif encode_btn or decode_btn:
+            path = st.session_state["settings_path"]
+            result = run_text(
+                path=path,
+                version=settings.settings_version(path),
+                mode="caesar_cypher",
+                text=text,
+                action=action,
+                keys=(("k", key),),
+                use_validation=use_validation
             )
+            show_result(result, f"{action}_data.txt")
     except Exception as ex_:
         st.error(f"Помилка: {ex_}")
 
@@ -168,6 +352,13 @@ def show_caesar_cypher_text_coder():
 def show_caesar_cypher_file_coder():
     key = st.number_input("Ключ", step=1, min_value=1)
     use_index = st.checkbox("Використовувати індекс для шифрування")
+    compression = st.selectbox(
+        "Стиснення", 
+        options=[None, *components.Compression.METHODS], 
+        format_func=lambda method: method or "без стиснення",
+        help="Дані стискаються перед шифруванням і розпаковуються після "
+            "розшифрування, тому для розшифрування потрібен той самий метод"
+    )
     file = st.file_uploader("Завантажити файл")
     c1, c2 = st.columns(2)
     encode_btn = c1.button("Шифрувати")
@@ -182,15 +373,17 @@ def show_caesar_cypher_file_coder():
             action = "decode"
 
         if (decode_btn or encode_btn) and file is not None:
-            result = components.FileCode.code(
-                file=file.read(),
-                k=key,
-                l=256,
-                func=func,
-                use_index= action if use_index else None
-            )
-            st.download_button(
-                "Завантажити", result, f"{action}_{file.name}"
+            components.FileCode.validate_key(key, 256)
+            submit_job(
+                f"{action}_{file.name}", 
+                file.size, 
+                jobs.code_file, 
+                file.getvalue(), 
+                key, 
+                func, 
+                action if use_index else None,
+                compression,
+                action
             )
     except Exception as ex_:
         st.error(f"Помилка: {ex_}")
@@ -212,6 +405,8 @@ def main():
     try:
         if not st.session_state.get("loaded"):
             load_env()
+        path = st.session_state["settings_path"]
+        configure_metrics(path, settings.settings_version(path))
 
         selected = st.radio(
             "Що необіхдно зашифрувати?", 
@@ -231,9 +426,16 @@ def main():
             "caesar_cypher_file": show_caesar_cypher_file_coder,
             "tabula_recta": show_tabula_recta_text_coder
         }[selected]()
+
+        if st.session_state.get("jobs"):
+            show_jobs()
     except Exception as ex_:
         st.error(f"{ex_}")
 
+    # панель метрик виводиться після обробки запиту, щоб враховувати його
+    with st.sidebar:
+        show_metrics()
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
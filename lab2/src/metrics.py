@@ -0,0 +1,273 @@
+import bisect
+import functools
+import json
+import threading
+import time
+import typing
+
+import components
+
+
+BUCKETS = (
+    0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0
+)
+# (клас, метод, позиція та назва аргументу з даними, одиниця обсягу);
+# позиція враховує self для звичайних методів
+TARGETS = [
+    (
+        components.AlphabetCode, "code_by_multiple_key_with_tabula_recta",
+        1, "text", "chars"
+    ),
+    (
+        components.AlphabetCode, "code_by_word_with_tabula_recta",
+        1, "text", "chars"
+    ),
+    (
+        components.AlphabetCode, "code_with_caesar_cypher",
+        1, "text", "chars"
+    ),
+    (components.AlphabetCode, "code_batch", 1, "texts", "chars"),
+    (components.FileCode, "code", 0, "file", "bytes"),
+    (components.FileCode, "code_into", 0, "buffer", "bytes"),
+    (
+        components.AttackTabulaRectaDetection, "check_hash",
+        None, None, None
+    ),
+    (
+        components.AttackTabulaRectaDetection, "insert_hash",
+        None, None, None
+    ),
+]
+
+
+def data_size(value) -> int:
+    # для пакета текстів обсяг — сумарна кількість символів
+    if isinstance(value, (list, tuple)):
+        return sum(len(item) for item in value)
+    return getattr(value, "nbytes", None) or len(value)
+
+
+class MethodStats:
+    def __init__(self, unit: str | None):
+        self.unit = unit
+        self.calls = 0
+        self.errors = 0
+        self.processed = 0
+        self.seconds = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+
+
+    def observe(self, seconds: float, size: int, failed: bool):
+        self.calls += 1
+        self.errors += failed
+        self.processed += size
+        self.seconds += seconds
+        self.buckets[bisect.bisect_left(BUCKETS, seconds)] += 1
+
+
+    @property
+    def throughput(self) -> float:
+        return self.processed / self.seconds if self.seconds else 0.0
+
+
+    def quantile(self, q: float) -> float:
+        # верхня межа кошика гістограми, в який потрапляє квантиль
+        rank, total = q * self.calls, 0
+        for bound, count in zip(BUCKETS + (float("inf"),), self.buckets):
+            total += count
+            if count and total >= rank:
+                return bound
+        return 0.0
+
+
+class Metrics:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._originals: dict[tuple[type, str], typing.Any] = {}
+        self.stats: dict[str, MethodStats] = {}
+        self.history_size = 0
+
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._originals)
+
+
+    def enable(self):
+        # вимірювання вбудовуються підміною методів класів, тому вимкнені
+        # метрики не додають до викликів жодних перевірок
+        with self._lock:
+            if self._originals:
+                return
+            for cls, name, position, argument, unit in TARGETS:
+                original = cls.__dict__[name]
+                self._originals[(cls, name)] = original
+                setattr(cls, name, self.wrap(
+                    cls, name, original, position, argument, unit
+                ))
+
+
+    def disable(self):
+        with self._lock:
+            for (cls, name), original in self._originals.items():
+                setattr(cls, name, original)
+            self._originals.clear()
+
+
+    def reset(self):
+        with self._lock:
+            self.stats.clear()
+            self.history_size = 0
+
+
+    def wrap(
+        self,
+        cls: type,
+        name: str,
+        original,
+        position: int | None,
+        argument: str | None,
+        unit: str | None
+    ):
+        is_static = isinstance(original, staticmethod)
+        func = original.__func__ if is_static else original
+        label = f"{cls.__name__}.{name}"
+        is_detection = cls is components.AttackTabulaRectaDetection
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            failed = True
+            try:
+                result = func(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                seconds = time.perf_counter() - start
+                size = 0
+                if argument is not None:
+                    value = args[position] if len(args) > position \
+                        else kwargs.get(argument, b"")
+                    size = data_size(value)
+                self.observe(label, unit, seconds, size, failed)
+                if is_detection:
+                    self.history_size = args[0].history_size
+
+        return staticmethod(wrapper) if is_static else wrapper
+
+
+    def observe(
+        self,
+        label: str,
+        unit: str | None,
+        seconds: float,
+        size: int,
+        failed: bool
+    ):
+        with self._lock:
+            if (stats := self.stats.get(label)) is None:
+                stats = self.stats[label] = MethodStats(unit)
+            stats.observe(seconds, size, failed)
+
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "timestamp": time.time(),
+                "detector_history_size": self.history_size,
+                "methods": {
+                    label: {
+                        "calls": stats.calls,
+                        "errors": stats.errors,
+                        "seconds": stats.seconds,
+                        "processed": stats.processed,
+                        "unit": stats.unit,
+                        "throughput": stats.throughput,
+                        "p50": stats.quantile(0.5),
+                        "p95": stats.quantile(0.95),
+                        "buckets": dict(zip(
+                            [str(b) for b in BUCKETS] + ["+Inf"],
+                            stats.buckets
+                        ))
+                    }
+                    for label, stats in self.stats.items()
+                }
+            }
+
+
+    def to_json(self) -> str:
+        return json.dumps(self.snapshot(), indent=4)
+
+
+    def to_prometheus(self) -> str:
+        lines = [
+            "# HELP cipher_calls_total Кількість викликів методів шифрування",
+            "# TYPE cipher_calls_total counter",
+        ]
+        with self._lock:
+            stats = list(self.stats.items())
+            history_size = self.history_size
+
+        for label, item in stats:
+            lines.append(
+                f'cipher_calls_total{{method="{label}"}} {item.calls}'
+            )
+        lines += [
+            "# HELP cipher_errors_total Кількість викликів, що завершились "
+            "помилкою",
+            "# TYPE cipher_errors_total counter",
+        ]
+        for label, item in stats:
+            lines.append(
+                f'cipher_errors_total{{method="{label}"}} {item.errors}'
+            )
+
+        lines += [
+            "# HELP cipher_duration_seconds Тривалість викликів",
+            "# TYPE cipher_duration_seconds histogram",
+        ]
+        for label, item in stats:
+            total = 0
+            for bound, count in zip(BUCKETS + ("+Inf",), item.buckets):
+                total += count
+                lines.append(
+                    f'cipher_duration_seconds_bucket{{method="{label}",'
+                    f'le="{bound}"}} {total}'
+                )
+            lines += [
+                f'cipher_duration_seconds_sum{{method="{label}"}} '
+                f"{item.seconds}",
+                f'cipher_duration_seconds_count{{method="{label}"}} '
+                f"{item.calls}",
+            ]
+
+        lines += [
+            "# HELP cipher_processed_total Обсяг оброблених даних",
+            "# TYPE cipher_processed_total counter",
+        ]
+        for label, item in stats:
+            if item.unit is not None:
+                lines.append(
+                    f'cipher_processed_total{{method="{label}",'
+                    f'unit="{item.unit}"}} {item.processed}'
+                )
+
+        lines += [
+            "# HELP detector_history_size Кількість запитів в історії "
+            "детектора атак",
+            "# TYPE detector_history_size gauge",
+            f"detector_history_size {history_size}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+    def export(self, path: str):
+        with open(path, "w") as file:
+            file.write(
+                self.to_json() if path.endswith(".json")
+                else self.to_prometheus()
+            )
+
+
+metrics = Metrics()
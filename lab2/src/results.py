@@ -0,0 +1,91 @@
+import atexit
+import os
+import shutil
+import tempfile
+import threading
+import time
+
+
+PREVIEW_SIZE = 10000
+SPILL_SIZE = 1 << 18
+MAX_AGE = 3600
+CLEANUP_INTERVAL = 300
+UNITS = ["Б", "КБ", "МБ", "ГБ"]
+
+
+class ResultStore:
+    def __init__(
+        self,
+        directory: str = None,
+        max_age: float = MAX_AGE,
+        interval: float = CLEANUP_INTERVAL
+    ):
+        self.directory = directory or tempfile.mkdtemp(prefix="results_")
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_age = max_age
+        self._closed = threading.Event()
+        # файли результатів видаляються за розкладом, тому пам'ять сервера
+        # і диск не ростуть разом з кількістю сесій
+        self._worker = threading.Thread(
+            target=self.run_cleanup, args=(interval,),
+            name="result-cleanup", daemon=True
+        )
+        self._worker.start()
+        atexit.register(self.close)
+
+
+    def save(self, data: str | bytes, suffix: str = "") -> str:
+        fd, path = tempfile.mkstemp(suffix=suffix, dir=self.directory)
+        with os.fdopen(fd, "wb") as file:
+            if isinstance(data, str):
+                data = data.encode("utf-8", "surrogatepass")
+            file.write(data)
+        return path
+
+
+    def read(self, path: str) -> bytes:
+        try:
+            with open(path, "rb") as file:
+                return file.read()
+        except FileNotFoundError:
+            raise FileNotFoundError(
+                "Результат видалено через завершення терміну зберігання"
+            )
+
+
+    def cleanup(self, max_age: float = None):
+        border = time.time() - (self.max_age if max_age is None else max_age)
+        for entry in os.scandir(self.directory):
+            try:
+                if entry.stat().st_mtime < border:
+                    os.remove(entry.path)
+            except FileNotFoundError:
+                continue
+
+
+    def run_cleanup(self, interval: float):
+        while not self._closed.wait(interval):
+            try:
+                self.cleanup()
+            except OSError:
+                continue
+
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+def format_size(size: int) -> str:
+    for unit in UNITS[:-1]:
+        if size < 1024:
+            return f"{size:.0f} {unit}" if unit == UNITS[0] \
+                else f"{size:.1f} {unit}"
+        size /= 1024
+    return f"{size:.1f} {UNITS[-1]}"
+
+
+def preview(text: str, size: int = PREVIEW_SIZE) -> tuple[str, bool]:
+    return text[:size], len(text) > size
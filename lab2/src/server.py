@@ -0,0 +1,759 @@
+from datetime import datetime, timedelta
+import argparse
+import asyncio
+import collections
+import concurrent.futures
+import json
+import os
+import string
+import sys
+import tempfile
+import time
+import typing
+import urllib.parse
+
+import components
+import metrics
+import settings
+
+
+BODY_CHUNK_SIZE = 1 << 16
+# більші тіла записуються в тимчасовий файл і обробляються пулом процесів
+POOL_THRESHOLD = 1 << 20
+MAX_BODY_SIZE = 1 << 30
+BATCH_TEXT_SIZE = 1 << 14
+BATCH_SIZE = 256
+BATCH_DELAY = 0.002
+MAX_CLIENTS = 1024
+STATUSES = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    411: "Length Required",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error"
+}
+worker = {}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+    def __reduce__(self):
+        # помилка може виникнути в процесі пулу й передається назад
+        return HTTPError, (self.status, str(self))
+
+
+class LimitedWriter:
+    def __init__(self, file: typing.BinaryIO, limit: int):
+        self.file = file
+        self.limit = limit
+        self.size = 0
+
+
+    def write(self, data: bytes) -> int:
+        # розпаковані дані можуть бути значно більшими за тіло запиту
+        self.size += len(data)
+        if self.size > self.limit:
+            raise HTTPError(413, "Завеликий обсяг розпакованих даних")
+        return self.file.write(data)
+
+
+def parse_size(value: bytes | str, base: int = 10) -> int:
+    # int() приймає знак, пробіли й підкреслення, а від'ємний розмір
+    # змусив би читати потік до кінця
+    value = value.strip()
+    if isinstance(value, bytes):
+        value = value.decode("latin-1")
+    digits = string.hexdigits if base == 16 else string.digits
+    if not value or not all(c in digits for c in value):
+        raise ValueError(value)
+    return int(value, base)
+
+
+class Request:
+    def __init__(
+        self,
+        method: str,
+        path: str,
+        query: dict[str, str],
+        headers: dict[str, str],
+        version: str,
+        reader: asyncio.StreamReader
+    ):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.headers = headers
+        self.version = version
+        self.reader = reader
+        self.consumed = not self.has_body
+
+
+    @property
+    def has_body(self) -> bool:
+        if self.headers.get("transfer-encoding"):
+            return True
+        return self.headers.get("content-length", "0").strip() != "0"
+
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+    async def iter_body(self) -> typing.AsyncIterator[bytes]:
+        async for chunk in self.iter_raw_body():
+            yield chunk
+        self.consumed = True
+
+
+    async def iter_raw_body(self) -> typing.AsyncIterator[bytes]:
+        if self.headers.get("transfer-encoding", "").lower() == "chunked":
+            while True:
+                line = await self.reader.readuntil(b"\r\n")
+                try:
+                    size = parse_size(line.split(b";")[0], 16)
+                except ValueError:
+                    raise HTTPError(400, "Некоректний розмір частини тіла")
+                if size == 0:
+                    # завершальні заголовки не використовуються
+                    while await self.reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    return
+                while size:
+                    chunk = await self.reader.read(
+                        min(size, BODY_CHUNK_SIZE)
+                    )
+                    if not chunk:
+                        raise asyncio.IncompleteReadError(b"", size)
+                    size -= len(chunk)
+                    yield chunk
+                await self.reader.readexactly(2)
+            return
+
+        if "content-length" not in self.headers:
+            if self.method == "POST":
+                raise HTTPError(411, "Необхідно вказати Content-Length")
+            return
+        try:
+            size = parse_size(self.headers["content-length"])
+        except ValueError:
+            raise HTTPError(400, "Некоректний Content-Length")
+        if size > MAX_BODY_SIZE:
+            raise HTTPError(413, "Завеликий обсяг даних")
+        while size:
+            chunk = await self.reader.read(min(size, BODY_CHUNK_SIZE))
+            if not chunk:
+                raise asyncio.IncompleteReadError(b"", size)
+            size -= len(chunk)
+            yield chunk
+
+
+    async def read_body(self) -> bytes | str:
+        # повертає дані або шлях до тимчасового файлу, якщо тіло більше
+        # за POOL_THRESHOLD; тіло читається частинами без повного буфера
+        data = bytearray()
+        file = None
+        size = 0
+        try:
+            async for chunk in self.iter_body():
+                size += len(chunk)
+                if size > MAX_BODY_SIZE:
+                    raise HTTPError(413, "Завеликий обсяг даних")
+                if file is not None:
+                    file.write(chunk)
+                    continue
+                data += chunk
+                if len(data) > POOL_THRESHOLD:
+                    file = tempfile.NamedTemporaryFile(delete=False)
+                    file.write(data)
+                    data = None
+        except BaseException:
+            if file is not None:
+                file.close()
+                os.remove(file.name)
+            raise
+
+        if file is None:
+            return bytes(data)
+        file.close()
+        return file.name
+
+
+def init_worker(path: str):
+    worker["alphabet"] = settings.load_alphabet(path)
+
+
+def hash_body_file(path: str) -> bytes:
+    with open(path, "rb") as file:
+        return components.AttackTabulaRectaDetection.hash_file(file)
+
+
+def code_text_file(
+    src_path: str,
+    dst_path: str,
+    mode: str,
+    action: str,
+    keys: dict,
+    use_validation: bool
+) -> int:
+    coder = components.TextStreamCoder(
+        worker["alphabet"], mode, action, use_validation, **keys
+    )
+    with open(src_path, encoding="utf-8", newline="") as src, \
+            open(dst_path, "w", encoding="utf-8", newline="") as dst:
+        coder.code_file(src, dst)
+    return os.path.getsize(dst_path)
+
+
+def code_binary_file(
+    src_path: str,
+    dst_path: str,
+    k: int,
+    action: str,
+    use_index: bool,
+    compression: str | None
+) -> int:
+    with open(src_path, "rb") as src, open(dst_path, "wb") as dst:
+        return components.FileCode.code_file(
+            src, LimitedWriter(dst, MAX_BODY_SIZE), k, 256, 
+            cipher_func(action),
+            action if use_index else None,
+            compression=compression,
+            action=action
+        )
+
+
+def cipher_func(action: str):
+    try:
+        return {
+            "encode": components.CaesarCipher.encode_caesar,
+            "decode": components.CaesarCipher.decode_caesar
+        }[action]
+    except KeyError:
+        raise HTTPError(404, f"Невідома дія: {action}")
+
+
+def batch_key(mode: str, keys: dict) -> typing.Any:
+    if mode == "caesar":
+        return keys["k"]
+    elif mode == "tabula_recta":
+        return (keys["a"], keys["b"], keys.get("c", 0))
+    return keys["keyword"]
+
+
+class TextBatcher:
+    def __init__(
+        self,
+        alphabet: components.AlphabetCode,
+        size: int = BATCH_SIZE,
+        delay: float = BATCH_DELAY
+    ):
+        self.alphabet = alphabet
+        self.size = size
+        self.delay = delay
+        self._batches: dict[tuple, list[tuple[str, asyncio.Future]]] = {}
+
+
+    async def code(
+        self,
+        text: str,
+        mode: str,
+        action: str,
+        key: typing.Any,
+        use_validation: bool
+    ) -> str:
+        # невеликі одночасні запити з однаковими режимом і ключем
+        # збираються в пакет і кодуються одним викликом code_batch
+        loop = asyncio.get_running_loop()
+        group = (mode, action, key, use_validation)
+        future = loop.create_future()
+        batch = self._batches.setdefault(group, [])
+        batch.append((text, future))
+        if len(batch) >= self.size:
+            self.flush(group)
+        elif len(batch) == 1:
+            loop.call_later(self.delay, self.flush, group)
+        return await future
+
+
+    def flush(self, group: tuple):
+        if not (batch := self._batches.pop(group, None)):
+            return
+        mode, action, key, use_validation = group
+        texts = [text for text, _ in batch]
+        try:
+            results = [
+                result for result, in self.alphabet.code_batch(
+                    texts, [key], action, mode, use_validation
+                )
+            ]
+        except Exception:
+            # помилка в одному тексті не повинна впливати на інші запити
+            # пакета, тому тексти кодуються окремо
+            for text, future in batch:
+                if future.done():
+                    continue
+                try:
+                    (result,), = self.alphabet.code_batch(
+                        [text], [key], action, mode, use_validation
+                    )
+                except Exception as ex_:
+                    future.set_exception(ex_)
+                else:
+                    future.set_result(result)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class CipherServer:
+    def __init__(
+        self,
+        settings_path: str,
+        workers: int = None,
+        block_time: float = None,
+        max_clients: int = MAX_CLIENTS
+    ):
+        self.settings_path = settings_path
+        self.alphabet = settings.load_alphabet(settings_path)
+        data = settings.read_settings(settings_path)
+        settings.create_detection(data)
+        # історія запитів спільна для всіх клієнтів, а блокування —
+        # окреме для кожної адреси й знімається через block_time секунд
+        # (за замовчуванням — вікно детектора)
+        self.tries, self.drop_tries = data["tries"], data["drop_tries"]
+        self.block_time = timedelta(
+            seconds=self.drop_tries if block_time is None else block_time
+        )
+        self.store = settings.create_detection_store(data) \
+            or components.MemoryRequestStore()
+        if max_clients < 1:
+            raise ValueError("Кількість клієнтів повинна бути більшою за 0")
+        self.max_clients = max_clients
+        # детектори неактивних адрес видаляються, коли минули і вікно
+        # історії, і блокування, або коли адрес забагато
+        self.client_ttl = max(
+            self.drop_tries, self.block_time.total_seconds()
+        )
+        self.detections: collections.OrderedDict[
+            str, tuple[components.AttackTabulaRectaDetection, float]
+        ] = collections.OrderedDict()
+        self.batcher = TextBatcher(self.alphabet)
+        self.pool = concurrent.futures.ProcessPoolExecutor(
+            workers, initializer=init_worker, initargs=(settings_path,)
+        )
+
+
+    def detection(self, client: str) -> components.AttackTabulaRectaDetection:
+        now = time.monotonic()
+        if (item := self.detections.pop(client, None)) is not None:
+            detection = item[0]
+        else:
+            detection = components.AttackTabulaRectaDetection(
+                self.tries, self.drop_tries, self.store, self.block_time
+            )
+        self.detections[client] = (detection, now)
+
+        while len(self.detections) > self.max_clients or (
+            now - next(iter(self.detections.values()))[1] > self.client_ttl
+        ):
+            self.detections.popitem(last=False)
+        return detection
+
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        peer = writer.get_extra_info("peername")
+        try:
+            # клієнт визначається адресою з'єднання, бо заголовки запиту
+            # може підставити будь-хто й так обійти блокування
+            client = peer[0] if peer else ""
+            while request := await self.read_request(reader):
+                try:
+                    await self.dispatch(request, writer, client)
+                except HTTPError as ex_:
+                    await self.send_error(writer, ex_.status, str(ex_))
+                except ValueError as ex_:
+                    await self.send_error(writer, 400, str(ex_))
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    raise
+                except Exception as ex_:
+                    await self.send_error(
+                        writer, 500, f"Внутрішня помилка сервера: {ex_}"
+                    )
+                # тіло, не прочитане через помилку, залишилось у потоці,
+                # тому наступний запит на цьому з'єднанні неможливо прочитати
+                if not request.keep_alive or not request.consumed:
+                    break
+        except HTTPError as ex_:
+            await self.send_error(writer, ex_.status, str(ex_))
+        except (
+            asyncio.IncompleteReadError, ConnectionError,
+            asyncio.LimitOverrunError
+        ):
+            pass
+        finally:
+            writer.close()
+
+
+    async def read_request(
+        self, reader: asyncio.StreamReader
+    ) -> Request | None:
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, version = lines[0].split(" ")
+        except ValueError:
+            raise HTTPError(400, "Некоректний рядок запиту")
+        headers = {}
+        for line in lines[1:]:
+            if line:
+                name, _, value = line.partition(":")
+                headers[name.strip().lower()] = value.strip()
+
+        url = urllib.parse.urlsplit(target)
+        query = dict(urllib.parse.parse_qsl(url.query))
+        return Request(method, url.path, query, headers, version, reader)
+
+
+    async def dispatch(
+        self, request: Request, writer: asyncio.StreamWriter, client: str
+    ):
+        parts = request.path.strip("/").split("/")
+        if parts == ["health"]:
+            await self.send(writer, 200, b"ok", "text/plain")
+        elif parts == ["metrics"]:
+            await self.send(
+                writer, 200, metrics.metrics.to_prometheus().encode(),
+                "text/plain; version=0.0.4; charset=utf-8"
+            )
+        elif len(parts) == 3 and parts[0] == "text":
+            self.check_method(request)
+            await self.code_text(request, writer, client, *parts[1:])
+        elif len(parts) == 2 and parts[0] == "file":
+            self.check_method(request)
+            await self.code_file(request, writer, parts[1])
+        elif len(parts) == 2 and parts[0] == "detection":
+            self.check_method(request)
+            await self.check_detection(request, writer, client, parts[1])
+        else:
+            raise HTTPError(404, f"Невідомий шлях: {request.path}")
+
+
+    @staticmethod
+    def check_method(request: Request):
+        if request.method != "POST":
+            raise HTTPError(405, "Підтримується лише метод POST")
+
+
+    @staticmethod
+    def int_param(request: Request, name: str, default: int = None) -> int:
+        value = request.query.get(name)
+        if value is None:
+            if default is None:
+                raise HTTPError(400, f"Необхідно вказати параметр {name}")
+            return default
+        try:
+            return int(value)
+        except ValueError:
+            raise HTTPError(400, f"Параметр {name} повинен бути числом")
+
+
+    @staticmethod
+    def flag_param(request: Request, name: str) -> bool:
+        return request.query.get(name, "").lower() in ("1", "true", "yes")
+
+
+    def text_keys(self, request: Request, mode: str) -> dict:
+        if mode == "caesar":
+            return {"k": self.int_param(request, "k")}
+        elif mode == "tabula_recta":
+            return {
+                "a": self.int_param(request, "a"),
+                "b": self.int_param(request, "b"),
+                "c": self.int_param(request, "c", 0)
+            }
+        elif mode == "keyword":
+            if not (keyword := request.query.get("keyword")):
+                raise HTTPError(400, "Необхідно вказати параметр keyword")
+            return {"keyword": keyword}
+        raise HTTPError(404, f"Невідомий режим: {mode}")
+
+
+    def check_text(self, client: str, text: str, keys: dict, action: str):
+        self.check_hash(
+            client, components.AttackTabulaRectaDetection.hash_text(text), 
+            keys, action
+        )
+
+
+    def check_hash(
+        self, client: str, text_hash: bytes, keys: dict, action: str
+    ):
+        detection = self.detection(client)
+        dt = datetime.now()
+        try:
+            if action == "decode":
+                detection.check_hash(
+                    text_hash, tuple(keys.values()), action, dt
+                )
+            detection.insert_hash(text_hash, tuple(keys.values()), action, dt)
+        except OSError as ex_:
+            raise HTTPError(429, str(ex_))
+
+
+    async def code_text(
+        self,
+        request: Request,
+        writer: asyncio.StreamWriter,
+        client: str,
+        mode: str,
+        action: str
+    ):
+        cipher_func(action)
+        keys = self.text_keys(request, mode)
+        use_validation = self.flag_param(request, "validate")
+        body = await request.read_body()
+
+        loop = asyncio.get_running_loop()
+        if isinstance(body, str):
+            try:
+                if mode != "caesar":
+                    # хеш великого тіла рахується частинами поза циклом
+                    # подій, щоб не читати файл у пам'ять і не блокувати
+                    # інші з'єднання
+                    text_hash = await loop.run_in_executor(
+                        None, hash_body_file, body
+                    )
+                    self.check_hash(client, text_hash, keys, action)
+            except BaseException:
+                os.remove(body)
+                raise
+            await self.run_in_pool(
+                writer, "text/plain; charset=utf-8", code_text_file,
+                body, mode, action, keys, use_validation
+            )
+            return
+
+        try:
+            text = body.decode("utf-8")
+        except UnicodeDecodeError:
+            raise HTTPError(400, "Текст повинен бути в кодуванні UTF-8")
+        if mode != "caesar":
+            self.check_text(client, text, keys, action)
+
+        if len(body) <= BATCH_TEXT_SIZE:
+            result = await self.batcher.code(
+                text, mode, action, batch_key(mode, keys), use_validation
+            )
+        else:
+            result = await loop.run_in_executor(
+                None, components.TextStreamCoder(
+                    self.alphabet, mode, action, use_validation, **keys
+                ).code, text
+            )
+        await self.send(
+            writer, 200, result.encode("utf-8", "surrogatepass"),
+            "text/plain; charset=utf-8"
+        )
+
+
+    async def code_file(
+        self, request: Request, writer: asyncio.StreamWriter, action: str
+    ):
+        func = cipher_func(action)
+        k = self.int_param(request, "k")
+        use_index = self.flag_param(request, "use_index")
+        compression = request.query.get("compression") or None
+        if compression not in (None, *components.Compression.METHODS):
+            raise HTTPError(
+                400, f"Невідомий метод стиснення: {compression}"
+            )
+        components.FileCode.validate_key(k, 256)
+        body = await request.read_body()
+
+        # розпакування невеликого тіла може дати гігабайти даних, тому
+        # воно також виконується пулом із записом результату на диск
+        if isinstance(body, bytes) and compression and action == "decode":
+            with tempfile.NamedTemporaryFile(delete=False) as file:
+                file.write(body)
+            body = file.name
+
+        if isinstance(body, str):
+            await self.run_in_pool(
+                writer, "application/octet-stream", code_binary_file,
+                body, k, action, use_index, compression
+            )
+            return
+
+        result = b"".join(components.Compression.wrap(
+            [body], action, compression,
+            lambda chunks: components.FileCode.code_stream(
+                chunks, k, 256, func, action if use_index else None
+            )
+        ))
+        await self.send(writer, 200, result, "application/octet-stream")
+
+
+    async def check_detection(
+        self,
+        request: Request,
+        writer: asyncio.StreamWriter,
+        client: str,
+        action: str
+    ):
+        cipher_func(action)
+        body = await request.read_body()
+        if isinstance(body, str):
+            os.remove(body)
+            raise HTTPError(413, "Завеликий обсяг даних")
+        self.check_text(
+            client, body.decode("utf-8", "replace"), request.query, action
+        )
+        await self.send(
+            writer, 200, json.dumps({"allowed": True}).encode(),
+            "application/json"
+        )
+
+
+    async def run_in_pool(
+        self,
+        writer: asyncio.StreamWriter,
+        content_type: str,
+        func: typing.Callable,
+        src_path: str,
+        *args
+    ):
+        fd, dst_path = tempfile.mkstemp()
+        os.close(fd)
+        try:
+            loop = asyncio.get_running_loop()
+            size = await loop.run_in_executor(
+                self.pool, func, src_path, dst_path, *args
+            )
+            with open(dst_path, "rb") as file:
+                await self.send_head(writer, 200, size, content_type)
+                while chunk := file.read(BODY_CHUNK_SIZE):
+                    writer.write(chunk)
+                    await writer.drain()
+        finally:
+            os.remove(src_path)
+            os.remove(dst_path)
+
+
+    async def send_head(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        size: int,
+        content_type: str
+    ):
+        writer.write(
+            f"HTTP/1.1 {status} {STATUSES[status]}\r\n"
+            f"Content-Type: {content_type}\r\n"
+            f"Content-Length: {size}\r\n\r\n".encode("latin-1")
+        )
+
+
+    async def send(
+        self,
+        writer: asyncio.StreamWriter,
+        status: int,
+        body: bytes,
+        content_type: str
+    ):
+        await self.send_head(writer, status, len(body), content_type)
+        writer.write(body)
+        await writer.drain()
+
+
+    async def send_error(
+        self, writer: asyncio.StreamWriter, status: int, message: str
+    ):
+        body = json.dumps({"error": message}, ensure_ascii=False)
+        await self.send(
+            writer, status, body.encode("utf-8"),
+            "application/json; charset=utf-8"
+        )
+
+
+    async def serve(self, host: str, port: int):
+        server = await asyncio.start_server(
+            self.handle_connection, host, port
+        )
+        print(f"Сервер працює на http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+def parse_args(args: list[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Локальний HTTP-сервіс шифрування"
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument(
+        "-w", "--workers", type=int, default=None,
+        help="кількість процесів для великих запитів"
+    )
+    parser.add_argument(
+        "--block-seconds", type=float, default=None,
+        help="тривалість блокування адреси після перевищення ліміту "
+            "розшифрувань (за замовчуванням — вікно детектора)"
+    )
+    parser.add_argument(
+        "--max-clients", type=int, default=MAX_CLIENTS,
+        help="кількість адрес, для яких зберігається стан детектора"
+    )
+    parser.add_argument(
+        "--metrics", action="store_true",
+        help="збирати метрики (доступні за адресою /metrics)"
+    )
+    return parser.parse_args(args)
+
+
+def main(args: list[str] = None) -> int:
+    args = parse_args(args)
+    try:
+        server = CipherServer(
+            settings.settings_path(), args.workers, 
+            args.block_seconds, args.max_clients
+        )
+    except Exception as ex_:
+        print(f"Помилка: {ex_}", file=sys.stderr)
+        return 1
+
+    if args.metrics:
+        metrics.metrics.enable()
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
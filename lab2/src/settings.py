@@ -0,0 +1,103 @@
+from datetime import timedelta
+import dotenv
+import json
+import os
+
+import components
+
+
+def settings_path() -> str:
+    try:
+        if not dotenv.load_dotenv():
+            raise FileNotFoundError("./.env")
+        
+        path = os.getenv("SETTINGS_PATH")
+        if not path:
+            raise ValueError(path)
+    except ValueError as ex_:
+        raise Exception(
+            "Необхідно внести шлях файлу налаштувань в SETTINGS_PATH"
+        )
+    except FileNotFoundError as ex_:
+        raise Exception(
+            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+        )
+    
+    return path
+
+
+def settings_version(path: str) -> int:
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError as ex_:
+        raise Exception(
+            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+        )
+
+
+def read_settings(path: str) -> dict:
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except FileNotFoundError as ex_:
+        raise Exception(
+            f"Неможливо знайти файл налаштувань за посиланням: {ex_}"
+        )
+
+
+def create_alphabet(data: dict) -> components.AlphabetCode:
+    try:
+        alphabets = data["alphabets"]
+        valid_chars = data["valid_chars"]
+        alphabet = components.AlphabetCode(
+            valid_chars=valid_chars, **alphabets
+        )
+    except KeyError as ex_:
+        raise Exception(
+            f"Необхідно внести дані в змінну: {ex_}"
+        )
+    except TypeError as ex_:
+        raise Exception(
+            f"Значення alphabets повинно бути словником"
+        )
+    
+    return alphabet
+
+
+def create_detection(data: dict) -> components.AttackTabulaRectaDetection:
+    try:
+        return components.AttackTabulaRectaDetection(
+            tries=data["tries"],
+            drop_tries=data["drop_tries"],
+            store=create_detection_store(data)
+        )
+    except KeyError as ex_:
+        raise Exception(
+            f"Необхідно внести дані в змінну: {ex_}"
+        )
+
+
+def load_alphabet(path: str) -> components.AlphabetCode:
+    return create_alphabet(read_settings(path))
+
+
+def create_detection_store(data: dict):
+    # без налаштування detection_store історія запитів зберігається
+    # в пам'яті окремо для кожного детектора
+    if not (options := data.get("detection_store")):
+        return None
+
+    import storage
+
+    try:
+        options = dict(options)
+        path = options.pop("path")
+        return storage.open_store(
+            path, timedelta(seconds=data["drop_tries"]), **options
+        )
+    except KeyError as ex_:
+        raise Exception(
+            f"Необхідно внести дані в змінну: detection_store.{ex_.args[0]}"
+        )
+    except (TypeError, ValueError) as ex_:
+        raise Exception(f"Некоректні параметри detection_store: {ex_}")
@@ -0,0 +1,190 @@
+from datetime import datetime, timedelta
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+
+class SQLiteRequestStore:
+    def __init__(
+        self,
+        path: str,
+        retention: timedelta,
+        batch_size: int = 256,
+        flush_interval: float = 0.5,
+        purge_interval: float = 60.0
+    ):
+        if batch_size < 1:
+            raise ValueError("Розмір пакета повинен бути більшим за 0")
+        if flush_interval <= 0 or purge_interval <= 0:
+            raise ValueError("Інтервал повинен бути більшим за 0")
+
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self._retention = retention
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._purge_interval = purge_interval
+        self._lock = threading.Lock()
+        self._pending: list[tuple[str, bytes, float]] = []
+        self._size = 0
+
+        # WAL дозволяє читати базу з інших процесів під час запису
+        self._connection = sqlite3.connect(
+            path, timeout=30, check_same_thread=False, isolation_level=None
+        )
+        self._connection.executescript("""
+            PRAGMA journal_mode=WAL;
+            PRAGMA synchronous=NORMAL;
+            CREATE TABLE IF NOT EXISTS requests (
+                action TEXT NOT NULL,
+                text_hash BLOB NOT NULL,
+                timestamp REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS requests_lookup
+                ON requests (action, text_hash, timestamp);
+            CREATE INDEX IF NOT EXISTS requests_timestamp
+                ON requests (timestamp);
+        """)
+        # межа очищення рахується від найновішого часу запиту, а не від
+        # годинника, бо детектор працює з часом, який передає викликач
+        (self._latest,) = self._connection.execute(
+            "SELECT MAX(timestamp) FROM requests"
+        ).fetchone()
+        self.purge()
+
+        self._closed = threading.Event()
+        self._worker = threading.Thread(
+            target=self.run_maintenance, name="request-store", daemon=True
+        )
+        self._worker.start()
+
+
+    def count(
+        self, req: tuple[str, bytes], border: datetime, dt: datetime
+    ) -> int:
+        action, text_hash = req
+        start, end = border.timestamp(), dt.timestamp()
+        with self._lock:
+            self.observe(end)
+            # записи з буфера ще не потрапили в базу, тому рахуються окремо;
+            # запити інших процесів стають видимими після їхнього скидання
+            pending = sum(
+                a == action and h == text_hash and start <= ts <= end
+                for a, h, ts in self._pending
+            )
+            (stored,) = self._connection.execute(
+                "SELECT COUNT(*) FROM requests WHERE action = ? "
+                "AND text_hash = ? AND timestamp BETWEEN ? AND ?",
+                (action, text_hash, start, end)
+            ).fetchone()
+        return stored + pending
+
+
+    def insert(self, req: tuple[str, bytes], dt: datetime, border: datetime):
+        # застарілі записи видаляє фоновий потік, тому border не потрібен
+        with self._lock:
+            self.observe(dt.timestamp())
+            self._pending.append((*req, dt.timestamp()))
+            if len(self._pending) >= self._batch_size:
+                self.write_pending()
+
+
+    def drop_before(self, border: datetime):
+        with self._lock:
+            self.write_pending()
+            self.delete_before(border.timestamp())
+
+
+    def flush(self):
+        with self._lock:
+            self.write_pending()
+
+
+    def observe(self, timestamp: float):
+        if self._latest is None or timestamp > self._latest:
+            self._latest = timestamp
+
+
+    def purge(self):
+        with self._lock:
+            self.write_pending()
+            if self._latest is not None:
+                self.delete_before(
+                    self._latest - self._retention.total_seconds()
+                )
+            (self._size,) = self._connection.execute(
+                "SELECT COUNT(*) FROM requests"
+            ).fetchone()
+
+
+    def write_pending(self):
+        if not self._pending:
+            return
+        with self._connection:
+            self._connection.execute("BEGIN IMMEDIATE")
+            self._connection.executemany(
+                "INSERT INTO requests (action, text_hash, timestamp) "
+                "VALUES (?, ?, ?)",
+                self._pending
+            )
+        self._size += len(self._pending)
+        self._pending.clear()
+
+
+    def delete_before(self, timestamp: float):
+        cursor = self._connection.execute(
+            "DELETE FROM requests WHERE timestamp < ?", (timestamp,)
+        )
+        self._size = max(self._size - cursor.rowcount, 0)
+
+
+    def run_maintenance(self):
+        next_purge = time.monotonic() + self._purge_interval
+        while not self._closed.wait(self._flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() >= next_purge:
+                    self.purge()
+                    next_purge = time.monotonic() + self._purge_interval
+            except sqlite3.Error:
+                # база тимчасово заблокована іншим процесом, спроба
+                # повториться на наступній ітерації
+                continue
+
+
+    @property
+    def size(self) -> int:
+        # кількість записів оновлюється під час очищення, тому враховує
+        # запити інших процесів із затримкою до purge_interval
+        with self._lock:
+            return self._size + len(self._pending)
+
+
+    def close(self):
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        self._worker.join()
+        with self._lock:
+            self.write_pending()
+            self._connection.close()
+
+
+stores: dict[str, SQLiteRequestStore] = {}
+stores_lock = threading.Lock()
+
+
+def open_store(path: str, retention: timedelta, **options) \
+        -> SQLiteRequestStore:
+    # одне з'єднання та один фоновий потік на файл бази в межах процесу
+    path = os.path.abspath(path)
+    with stores_lock:
+        if (store := stores.get(path)) is None:
+            store = stores[path] = SQLiteRequestStore(
+                path, retention, **options
+            )
+            atexit.register(store.close)
+    return store